@@ -1,192 +1,224 @@
 from __future__ import annotations
-import sys, os, json, datetime, subprocess, webbrowser, time
+import time
+STARTED = time.perf_counter()  # --profile counts everything from here to the first paint
+import sys, os, json, datetime, threading, itertools
 
-from PyQt6.QtCore import Qt, QSize, QThread, pyqtSignal, QObject, QTimer
-from PyQt6.QtGui import QFont, QColor
+from PyQt6.QtCore import (
+    Qt, QSize, QThread, pyqtSignal, pyqtSlot, QObject, QTimer, QRunnable, QThreadPool,
+    QAbstractItemModel, QModelIndex, QRect, QRectF, QEvent
+)
+from PyQt6.QtGui import QFont, QColor, QPainter, QPen, QShortcut, QKeySequence
 from PyQt6.QtWidgets import (
-    QApplication, QWidget, QMainWindow, QVBoxLayout, QHBoxLayout, QGridLayout,
+    QApplication, QWidget, QMainWindow, QVBoxLayout, QGridLayout,
     QScrollArea, QLineEdit, QLabel, QPushButton, QFileDialog, QMessageBox,
-    QFrame, QDialog, QDialogButtonBox, QFormLayout, QPlainTextEdit, QSpacerItem,
-    QSizePolicy, QProgressBar
+    QFrame, QDialog, QSpacerItem,
+    QSizePolicy, QProgressBar, QTreeView, QStyledItemDelegate, QStyle, QMenu
+)
+
+from file_manager_core import (
+    PARTIAL_DOWNLOAD_EXTS, optional_module, load_settings, METRICS, new_item_id, write_atomic,
+    item_kind, open_store, WriteBehindStore, ItemIndex, TOKEN_RE, SearchIndex, scan_roots,
+    root_accepts, snapshot_folder, file_title, plan_import, display_title, Scanner, diff_folder, Launcher,
+    new_file_duplicates, normalize_path, load_cache, PathHealth, HEALTH_CACHE_FILE, HEALTH_MARKERS, BASE_DIR
 )
 
-# ---- data location next to .py / .exe ----
-if getattr(sys, "frozen", False):
-    BASE_DIR = os.path.dirname(sys.executable)
-else:
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_FILE = os.path.join(BASE_DIR, "file_data.json")
+IMPORTED = time.perf_counter()
+
+PROFILE_FILE = os.path.join(BASE_DIR, "startup_profile.json")
+OPEN_ALL_CONFIRM = 10  # "Open all" asks first when a day has more files than this
+POLL_INTERVAL = 5  # seconds between folder checks when watchdog isn't installed
+WATCH_BATCH_MS = 500  # file events arriving within this window are applied as one batch
+STREAM_DAYS = 200  # days taken per event-loop turn while the rest of the history is still being read
+
+# ---------------- Search & launch workers ---------------- #
+
+class SearchSignals(QObject):
+    batch = pyqtSignal(int, str, object, list, bool)  # generation, query, hits, [(date, whole_day)], done
+
+class DedupSignals(QObject):
+    done = pyqtSignal(list, dict)  # [(path, ctime)], {new path: path of the same content already listed}
+
+class LauncherSignals(QObject):
+    failed = pyqtSignal(str, str)  # target, message; emitted on the launcher thread, delivered on the GUI thread
+
+class SearchTask(QRunnable):
+    """Runs one query off the GUI thread and streams the matching dates back, newest first,
+    SEARCH_BATCH dates at a time. Gives up as soon as a newer keystroke bumps the generation."""
+    SEARCH_BATCH = 25
+
+    def __init__(self, generation: int, query: str, index: SearchIndex, dates: list[str], current,
+                 build_from: dict | None = None, scan_from: dict | None = None):
+        super().__init__()
+        self.signals = SearchSignals()
+        self.generation, self.query, self.index, self.dates = generation, query, index, dates
+        self.current = current  # callable returning the newest generation
+        self.build_from = build_from  # snapshot to build the index from on first use
+        self.scan_from = scan_from  # snapshot for queries without word characters
+
+    def stale(self) -> bool:
+        return self.current() != self.generation
+
+    def run(self):
+        if self.build_from is not None:
+            self.index.build(self.build_from)  # even if stale: later tasks rely on it
+        if self.stale():
+            return
+        hits = self.index.search(self.query)
+        if hits is None:
+            hits = {it["id"]: date for date, items in (self.scan_from or {}).items()
+                    for it in items if self.query in str(it).lower()}
+        wanted = set(hits.values())
+        batch = []
+        for date in self.dates:
+            if self.query in date.lower():
+                batch.append((date, True))
+            elif date in wanted:
+                batch.append((date, False))
+            if len(batch) == self.SEARCH_BATCH:
+                if self.stale():
+                    return
+                self.signals.batch.emit(self.generation, self.query, hits, batch, False)
+                batch = []
+        if not self.stale():
+            self.signals.batch.emit(self.generation, self.query, hits, batch, True)
 
-# ---------------- Auto-Add Logic & Worker ---------------- #
+class DedupTask(QRunnable):
+    """Hashes files the watcher found against the stored ones in their folders, off the GUI thread."""
+    def __init__(self, created: list[tuple[str, float]], known: dict[str, str], workers: int):
+        super().__init__()
+        self.signals = DedupSignals()
+        self.created, self.known, self.workers = created, known, workers
+
+    def run(self):
+        dupes = new_file_duplicates([path for path, _ in self.created], self.known, self.workers)
+        self.signals.done.emit(self.created, dupes)
+
+# ---------------- Auto-Add Worker & Watcher ---------------- #
 
 class FileScannerWorker(QObject):
-    finished = pyqtSignal(dict)
+    """Runs the core Scanner on a QThread and reports back through signals."""
+    finished = pyqtSignal(list)
     progress = pyqtSignal(int, str)
+    summary = pyqtSignal(dict)  # scanned, new, skipped, errors, elapsed; sent right before finished
+
+    def __init__(self, store: WriteBehindStore, roots: list[dict], workers: int = 4, dedup: str = "off",
+                 known: dict | None = None):
+        super().__init__()
+        self.scanner = Scanner(store, roots, workers, dedup, known, progress=self.progress.emit)
 
     def run(self):
-        """Scans the Downloads folder and updates data based on file creation time."""
-        data = {}
-        if os.path.exists(DATA_FILE):
-            try:
-                with open(DATA_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-            except:
-                data = {}
-
-        downloads_path = os.path.join(os.path.expanduser("~"), "Downloads")
-        if not os.path.exists(downloads_path):
-            self.finished.emit(data)
-            return
+        added, stats = self.scanner.run()
+        self.summary.emit(stats)
+        self.finished.emit(added)
 
-        files = [f for f in os.listdir(downloads_path) if os.path.isfile(os.path.join(downloads_path, f))]
-        total_files = len(files)
-        
-        existing_paths = set()
-        for date_group in data.values():
-            for item in date_group:
-                if "path" in item:
-                    existing_paths.add(item["path"])
-
-        for i, filename in enumerate(files):
-            full_path = os.path.join(downloads_path, filename)
-            
-            if full_path not in existing_paths:
-                # Get Windows Creation Time
-                timestamp = os.path.getctime(full_path)
-                dt_object = datetime.date.fromtimestamp(timestamp)
-                date_str = str(dt_object)
-
-                # Format name: Filename (.EXT)
-                name_part, ext_part = os.path.splitext(filename)
-                formatted_name = f"{name_part} ({ext_part.replace('.', '').upper()})"
-
-                if date_str not in data:
-                    data[date_str] = []
-                
-                data[date_str].append({"desc": formatted_name, "path": full_path})
-                existing_paths.add(full_path)
-
-            percent = int(((i + 1) / total_files) * 100) if total_files > 0 else 100
-            self.progress.emit(percent, f"Checking: {filename[:30]}...")
-            
-        self.finished.emit(data)
-
-class LoadingScreen(QDialog):
-    def __init__(self):
+    def commit_cache(self):
+        self.scanner.commit_cache()
+
+class PathHealthWorker(QObject):
+    """Runs the core PathHealth check on a low-priority QThread; results arrive a batch at a time."""
+    batch = pyqtSignal(dict)  # {path: [status, checked_at, moved_to]}
+    finished = pyqtSignal(dict)  # checked, ok, missing, moved, offline
+
+    def __init__(self, paths: list[str], search: list[str]):
         super().__init__()
-        self.setWindowTitle("Syncing Files...")
-        self.setFixedSize(400, 120)
-        self.setWindowFlags(Qt.WindowType.Window | Qt.WindowType.CustomizeWindowHint | Qt.WindowType.WindowTitleHint)
-        
-        layout = QVBoxLayout(self)
-        self.label = QLabel("Initializing scanner...")
-        self.label.setFont(QFont("Segoe UI", 10))
-        
-        self.pbar = QProgressBar()
-        self.pbar.setStyleSheet("""
-            QProgressBar { border: 1px solid #c9c9c9; border-radius: 5px; text-align: center; }
-            QProgressBar::chunk { background-color: #0B5ED7; }
-        """)
-        
-        layout.addWidget(self.label)
-        layout.addWidget(self.pbar)
+        self.paths, self.search = paths, search
+        self.health = PathHealth(load_cache(HEALTH_CACHE_FILE))
 
-    def update_progress(self, val, text):
-        self.pbar.setValue(val)
-        self.label.setText(text)
+    def run(self):
+        self.finished.emit(self.health.run(self.paths, self.search, self.batch.emit))
 
-# ---------------- Dialogs ---------------- #
+class _WatchdogHandler:
+    def __init__(self, watcher: "FolderWatcher"):
+        self.watcher = watcher
 
-class TitleInputDialog(QDialog):
-    def __init__(self, filename: str, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("File Title")
-        self.setModal(True)
-        layout = QVBoxLayout(self)
-        lbl = QLabel(f"Enter title for:\n{os.path.basename(filename)}")
-        self.edit = QLineEdit()
-        self.edit.setFont(QFont("Segoe UI", 12))
-        self.edit.setPlaceholderText(os.path.basename(filename))
-        layout.addWidget(lbl)
-        layout.addWidget(self.edit)
-        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Save |
-                                   QDialogButtonBox.StandardButton.Cancel)
-        buttons.accepted.connect(self.accept)
-        buttons.rejected.connect(self.reject)
-        layout.addWidget(buttons)
-
-    def value(self) -> str:
-        text = self.edit.text().strip()
-        return text if text else self.edit.placeholderText()
-
-class NoteDialog(QDialog):
-    def __init__(self, title_text: str = "", note_text: str = "", parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("📝 Add / Edit Note")
-        self.resize(400, 350)
-        form = QFormLayout(self)
-        self.title_edit = QLineEdit()
-        self.title_edit.setFont(QFont("Segoe UI", 12))
-        self.title_edit.setText(title_text)
-        self.title_edit.setPlaceholderText("Untitled Note")
-        form.addRow("Title:", self.title_edit)
-        self.note_edit = QPlainTextEdit()
-        self.note_edit.setPlainText(note_text)
-        self.note_edit.setPlaceholderText("Write your note here...")
-        form.addRow("Note:", self.note_edit)
-        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Save |
-                                   QDialogButtonBox.StandardButton.Cancel)
-        buttons.accepted.connect(self.accept)
-        buttons.rejected.connect(self.reject)
-        form.addRow(buttons)
-    def get(self):
-        title = self.title_edit.text().strip() or "Untitled Note"
-        note = self.note_edit.toPlainText().strip()
-        return title, note
-
-class LinkDialog(QDialog):
-    def __init__(self, title_text: str = "", url_text: str = "", parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("🔗 Add Link")
-        self.resize(400, 200)
-        form = QFormLayout(self)
-        self.title_edit = QLineEdit()
-        self.title_edit.setFont(QFont("Segoe UI", 12))
-        self.title_edit.setText(title_text)
-        self.title_edit.setPlaceholderText("Untitled Link")
-        form.addRow("Title:", self.title_edit)
-        self.url_edit = QLineEdit()
-        self.url_edit.setFont(QFont("Segoe UI", 12))
-        self.url_edit.setText(url_text)
-        self.url_edit.setPlaceholderText("https://example.com")
-        form.addRow("URL:", self.url_edit)
-        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Save |
-                                   QDialogButtonBox.StandardButton.Cancel)
-        buttons.accepted.connect(self.accept)
-        buttons.rejected.connect(self.reject)
-        form.addRow(buttons)
-    def get(self):
-        title = self.title_edit.text().strip() or "Untitled Link"
-        url = self.url_edit.text().strip()
-        return title, url
-
-class RenameDialog(QDialog):
-    def __init__(self, current: str, parent=None):
+    def dispatch(self, event):
+        if event.is_directory:
+            return
+        if event.event_type == "moved":
+            self.watcher.push([("moved", event.src_path, event.dest_path)])
+        elif event.event_type in ("created", "deleted"):
+            self.watcher.push([(event.event_type, event.src_path, None)])
+
+class FolderWatcher(QObject):
+    """Reports new, renamed and deleted files under the scan roots while the app runs.
+
+    Uses watchdog (inotify / ReadDirectoryChangesW / FSEvents) when it is installed
+    and otherwise polls the roots' top level every POLL_INTERVAL seconds. Events are
+    collected and handed over as one `changes` batch WATCH_BATCH_MS after the first one.
+    """
+    changes = pyqtSignal(list)
+    wake = pyqtSignal()
+
+    def __init__(self, roots: list[dict], parent=None):
         super().__init__(parent)
-        self.setWindowTitle("Rename Item")
-        self.resize(400, 150)
-        v = QVBoxLayout(self)
-        v.addWidget(QLabel("Enter new title:"))
-        self.edit = QLineEdit(current)
-        self.edit.setFont(QFont("Segoe UI", 12))
-        v.addWidget(self.edit)
-        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Save |
-                                   QDialogButtonBox.StandardButton.Cancel)
-        buttons.accepted.connect(self.accept)
-        buttons.rejected.connect(self.reject)
-        v.addWidget(buttons)
-    def value(self):
-        return self.edit.text().strip()
+        self.roots = [r for r in roots if os.path.isdir(r["path"])]
+        self.pending = []
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.observer = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+        self.wake.connect(self.schedule_flush)
+
+    def start(self):
+        observers = optional_module("watchdog.observers")  # native file events instead of polling
+        if observers is not None:
+            self.observer = observers.Observer()
+            handler = _WatchdogHandler(self)
+            for root in self.roots:
+                self.observer.schedule(handler, root["path"], recursive=root["recursive"])
+            self.observer.start()
+        else:
+            threading.Thread(target=self.poll, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.observer:
+            self.observer.stop()
+            self.observer.join(1)
+
+    def accepts(self, path: str) -> bool:
+        return any(root_accepts(root, path) for root in self.roots)
+
+    def push(self, events: list[tuple]):
+        """Called from the watcher threads; only the first event of a batch wakes the GUI thread."""
+        events = [e for e in events if self.accepts(e[1]) or (e[2] and self.accepts(e[2]))]
+        with self.lock:
+            was_empty = not self.pending
+            self.pending.extend(events)
+        if was_empty and events:
+            self.wake.emit()
+
+    @pyqtSlot()
+    def schedule_flush(self):
+        if not self.timer.isActive():
+            self.timer.start(WATCH_BATCH_MS)
+
+    def flush(self):
+        with self.lock:
+            events, self.pending = self.pending, []
+        if events:
+            self.changes.emit(events)
+
+    def poll(self):
+        states = {}
+        for folder in {root["path"] for root in self.roots}:
+            try:
+                states[folder] = (os.stat(folder).st_mtime_ns, snapshot_folder(folder)[0])
+            except OSError:
+                states[folder] = (None, {})
+        while not self.stopped.wait(POLL_INTERVAL):
+            for folder, (mtime, files) in list(states.items()):
+                try:
+                    new_mtime = os.stat(folder).st_mtime_ns
+                    if new_mtime == mtime:
+                        continue
+                    new_files = snapshot_folder(folder)[0]
+                except OSError:
+                    continue  # folder is gone for now (unplugged drive, network share)
+                self.push(diff_folder(folder, files, new_files))
+                states[folder] = (new_mtime, new_files)
 
 # ------------- Collapsible section ------------- #
 
@@ -206,6 +238,9 @@ class CollapsibleSection(QFrame):
         self.header_btn.setObjectName("headerButton")
         self.header_btn.setCursor(Qt.CursorShape.PointingHandCursor)
         self.header_btn.clicked.connect(self.toggle)
+        self.header_btn.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.header_btn.customContextMenuRequested.connect(
+            lambda pos: self.app.group_menu(self.date, self.header_btn.mapToGlobal(pos)))
         v.addWidget(self.header_btn)
 
         self.container = QWidget()
@@ -217,29 +252,59 @@ class CollapsibleSection(QFrame):
         
         v.addWidget(self.container)
         self.container.setVisible(False)
-        self.refresh_rows()
+        self.built = False  # rows are only created the first time the section is opened
+        self.row_labels = {}  # item id -> label, for patching a single row
 
     def toggle(self):
         self.collapsed = not self.collapsed
-        self.header_btn.setText(self.header_btn.text().replace("▾", "▸") if self.collapsed else self.header_btn.text().replace("▸", "▾"))
+        text = self.header_btn.text()
+        self.header_btn.setText(text.replace("▾", "▸") if self.collapsed else text.replace("▸", "▾"))
+        if not self.collapsed:
+            items = self.app.load_group(self.date)  # None unless some of its days were still on disk
+            if items is not None:
+                self.items, self.built = items, False
+        if not self.collapsed and not self.built:
+            self.refresh_rows()
         self.container.setVisible(not self.collapsed)
+        if self.collapsed and len(self.items) > self.app.settings["release_rows_over"]:
+            self.clear_rows()
 
     def expand(self):
-        if self.collapsed: self.toggle()
+        if self.collapsed:
+            self.toggle()
 
     def truncate_text(self, text: str, length: int = 50) -> str:
         return text[:length] + "..." if len(text) > length else text
 
-    def refresh_rows(self):
+    def clear_rows(self):
         while self.grid.count():
             item = self.grid.takeAt(0)
-            if item.widget(): item.widget().deleteLater()
+            if item.widget():
+                item.widget().deleteLater()
+        self.row_labels = {}
+        self.built = False
+
+    def display_text(self, f: dict) -> str:
+        return self.truncate_text(self.app.row_title(f))
 
+    def update_row(self, f: dict):
+        """Re-labels one row after a rename / note edit without touching the others."""
+        if f.get("id") in self.row_labels:
+            self.row_labels[f["id"]].setText(self.display_text(f))
+
+    @METRICS.timed("section.refresh_rows")
+    def refresh_rows(self):
+        self.clear_rows()
+        if self.collapsed:
+            return  # rebuilt on the next expand
+        self.built = True
+
+        METRICS.count("section.rows_built", len(self.items))
         for r, f in enumerate(self.items):
-            display_text = f.get("title") if "note" in f else f.get("desc", "")
-            lbl = QLabel(self.truncate_text(display_text))
+            lbl = QLabel(self.display_text(f))
             lbl.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
             self.grid.addWidget(lbl, r, 0)
+            self.row_labels[f.get("id")] = lbl
 
             def add_btn(text, handler, width=100):
                 btn = QPushButton(text)
@@ -251,24 +316,268 @@ class CollapsibleSection(QFrame):
 
             if "path" in f:
                 self.grid.addWidget(add_btn("Open", lambda _, p=f["path"]: self.app.open_file(p)), r, 1)
-                self.grid.addWidget(add_btn("Rename", lambda _, d=self.date, it=f: self.app.rename_item(d, it)), r, 2)
-                self.grid.addWidget(add_btn("Delete", lambda _, d=self.date, it=f: self.app.delete_item(d, it)), r, 3)
+                self.grid.addWidget(add_btn("Rename", lambda _, i=f["id"]: self.app.rename_item(i)), r, 2)
+                self.grid.addWidget(add_btn("Delete", lambda _, i=f["id"]: self.app.delete_item(i)), r, 3)
             elif "note" in f:
-                self.grid.addWidget(add_btn("View Note", lambda _, it=f: self.app.open_note_popup(it), width=210), r, 1, 1, 2)
-                self.grid.addWidget(add_btn("Delete", lambda _, d=self.date, it=f: self.app.delete_item(d, it)), r, 3)
+                view_btn = add_btn("View Note", lambda _, i=f["id"]: self.app.open_note_popup(i), width=210)
+                self.grid.addWidget(view_btn, r, 1, 1, 2)
+                self.grid.addWidget(add_btn("Delete", lambda _, i=f["id"]: self.app.delete_item(i)), r, 3)
             elif "url" in f:
                 self.grid.addWidget(add_btn("Open Link", lambda _, u=f["url"]: self.app.open_link(u)), r, 1)
-                self.grid.addWidget(add_btn("Rename", lambda _, d=self.date, it=f: self.app.rename_item(d, it)), r, 2)
-                self.grid.addWidget(add_btn("Delete", lambda _, d=self.date, it=f: self.app.delete_item(d, it)), r, 3)
+                self.grid.addWidget(add_btn("Rename", lambda _, i=f["id"]: self.app.rename_item(i)), r, 2)
+                self.grid.addWidget(add_btn("Delete", lambda _, i=f["id"]: self.app.delete_item(i)), r, 3)
+
+# ------------- Tree view ------------- #
+
+DATE_ROLE = Qt.ItemDataRole.UserRole + 1
+ROW_HEIGHT = 38
+ROW_ACTIONS = {
+    "file": (("open", "Open", 100), ("rename", "Rename", 100), ("delete", "Delete", 100)),
+    "note": (("note", "View Note", 210), ("delete", "Delete", 100)),
+    "link": (("link", "Open Link", 100), ("rename", "Rename", 100), ("delete", "Delete", 100)),
+}
+
+class _DateNode:
+    __slots__ = ("date", "items", "row")
+
+    def __init__(self, date: str, items: list[dict], row: int):
+        self.date, self.items, self.row = date, items, row
+
+class ItemTreeModel(QAbstractItemModel):
+    """Dates as top-level rows, their items as children. Holds references only; nothing is copied."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.nodes = []
+        self.title = display_title  # item -> row text; the window adds path-health markers
+
+    def set_groups(self, groups: list[tuple[str, list[dict]]]):
+        self.beginResetModel()
+        self.nodes = [_DateNode(date, items, r) for r, (date, items) in enumerate(groups)]
+        self.endResetModel()
+
+    def replace_items(self, row: int, items: list[dict]):
+        parent, node = self.index(row, 0), self.nodes[row]
+        if node.items:
+            self.beginRemoveRows(parent, 0, len(node.items) - 1)
+            node.items = []
+            self.endRemoveRows()
+        if items:
+            self.beginInsertRows(parent, 0, len(items) - 1)
+            node.items = items
+            self.endInsertRows()
+
+    def append_groups(self, groups: list[tuple[str, list[dict]]]):
+        if groups and self.nodes and self.nodes[-1].date == groups[0][0]:  # a month/year continued from the last batch
+            self.replace_items(len(self.nodes) - 1, self.nodes[-1].items + groups[0][1])
+            groups = groups[1:]
+        if not groups:
+            return
+        start = len(self.nodes)
+        self.beginInsertRows(QModelIndex(), start, start + len(groups) - 1)
+        self.nodes += [_DateNode(date, items, start + r) for r, (date, items) in enumerate(groups)]
+        self.endInsertRows()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        # children point at their date node, top-level rows carry no pointer
+        return self.createIndex(row, column, self.nodes[parent.row()] if parent.isValid() else None)
+
+    def parent(self, index):
+        node = index.internalPointer() if index.isValid() else None
+        return self.createIndex(node.row, 0, None) if node is not None else QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.nodes)
+        if parent.internalPointer() is None:
+            return len(self.nodes[parent.row()].items)
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if node is None:
+            if role in (Qt.ItemDataRole.DisplayRole, DATE_ROLE):
+                return self.nodes[index.row()].date
+            return None
+        item = node.items[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.title(item)
+        if role == Qt.ItemDataRole.UserRole:
+            return item
+        if role == DATE_ROLE:
+            return node.date
+        return None
+
+class ItemActionDelegate(QStyledItemDelegate):
+    """Paints the date headers and each row's buttons, so no widgets exist per row."""
+    action = pyqtSignal(str, str, object)  # action name, date, item
+    SPACING = 10
+
+    def button_rects(self, rect: QRect, item: dict) -> list[tuple[str, str, QRect]]:
+        buttons, right = [], rect.right() - self.SPACING
+        for name, text, width in reversed(ROW_ACTIONS[item_kind(item)]):
+            buttons.append((name, text, QRect(right - width + 1, rect.top() + 4, width, rect.height() - 8)))
+            right -= width + self.SPACING
+        return buttons[::-1]
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        item = index.data(Qt.ItemDataRole.UserRole)
+        if item is None:
+            # date header, drawn like the section header button
+            box = QRectF(option.rect.adjusted(1, 2, -1, -2))
+            painter.setPen(QPen(QColor("#d0d4d9")))
+            painter.setBrush(QColor("#e9ecef"))
+            painter.drawRoundedRect(box, 8, 8)
+            font = QFont(option.font)
+            font.setWeight(QFont.Weight.DemiBold)
+            painter.setFont(font)
+            painter.setPen(QColor("#111"))
+            arrow = "▾" if option.state & QStyle.StateFlag.State_Open else "▸"
+            painter.drawText(option.rect.adjusted(10, 0, 0, 0),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, f"{index.data()} {arrow}")
+            painter.restore()
+            return
+        buttons = self.button_rects(option.rect, item)
+        text_rect = QRect(option.rect.left() + 10, option.rect.top(), 0, option.rect.height())
+        text_rect.setRight(buttons[0][2].left() - self.SPACING)
+        painter.setPen(QColor("#111"))
+        text = option.fontMetrics.elidedText(index.data() or "", Qt.TextElideMode.ElideRight, text_rect.width())
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, text)
+        font = QFont(option.font)
+        font.setWeight(QFont.Weight.DemiBold)
+        painter.setFont(font)
+        for _, label, rect in buttons:
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor("#0B5ED7"))
+            painter.drawRoundedRect(QRectF(rect), 6, 6)
+            painter.setPen(QColor("#fff"))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, label)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), ROW_HEIGHT)
+
+    def editorEvent(self, event, model, option, index):
+        item = index.data(Qt.ItemDataRole.UserRole)
+        if (item is not None and event.type() == QEvent.Type.MouseButtonRelease
+                and event.button() == Qt.MouseButton.LeftButton):
+            for name, _, rect in self.button_rects(option.rect, item):
+                if rect.contains(event.position().toPoint()):
+                    self.action.emit(name, index.data(DATE_ROLE), item)
+                    return True
+        return super().editorEvent(event, model, option, index)
+
+class ItemTreeView(QTreeView):
+    """Virtualized replacement for the CollapsibleSection list: only visible rows are ever painted."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.model_ = ItemTreeModel(self)
+        self.delegate = ItemActionDelegate(self)
+        self.setModel(self.model_)
+        self.setItemDelegate(self.delegate)
+        self.setHeaderHidden(True)
+        self.setRootIsDecorated(False)
+        self.setUniformRowHeights(True)  # lets the view skip measuring rows it never shows
+        self.setExpandsOnDoubleClick(False)
+        self.setIndentation(0)
+        self.setFrameShape(QFrame.Shape.NoFrame)
+        self.setSelectionMode(QTreeView.SelectionMode.NoSelection)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.clicked.connect(self.toggle)
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.date_menu)
+        self.menu = None  # (group key, global pos) -> context menu for a date row
+        self.loader = None  # group key -> items, for days whose month is not loaded yet; None if nothing to load
+
+    def toggle(self, index):
+        if index.parent().isValid():
+            return
+        if not self.isExpanded(index) and self.loader:
+            items = self.loader(index.data())
+            if items is not None:
+                self.model_.replace_items(index.row(), items)
+        self.setExpanded(index, not self.isExpanded(index))
+
+    def date_menu(self, pos):
+        index = self.indexAt(pos)
+        if index.isValid() and not index.parent().isValid() and self.menu:
+            self.menu(index.data(), self.viewport().mapToGlobal(pos))
+
+    def set_groups(self, groups: list[tuple[str, list[dict]]], expanded: set, expand_all: bool = False):
+        self.model_.set_groups(groups)
+        if expand_all:
+            return self.expandAll()
+        for node in self.model_.nodes:
+            if node.date in expanded:
+                self.setExpanded(self.model_.index(node.row, 0), True)
+
+    def append_groups(self, groups: list[tuple[str, list[dict]]], expand: bool = True):
+        start = len(self.model_.nodes)
+        self.model_.append_groups(groups)
+        if expand:
+            for row in range(start, len(self.model_.nodes)):
+                self.setExpanded(self.model_.index(row, 0), True)
+
+    def expanded_dates(self) -> set:
+        return {n.date for n in self.model_.nodes if self.isExpanded(self.model_.index(n.row, 0))}
+
+# ---------------- Startup profile ---------------- #
+
+class StartupProfile:
+    """`--profile` (or FILE_MANAGER_PROFILE=1): how long imports, loading, the first paint and the
+    background scan took. Printed and written to startup_profile.json, since the .exe has no console."""
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.phases = {"imports": IMPORTED - STARTED}
+        self.last = IMPORTED
+
+    def mark(self, phase: str):
+        """Records the time since the previous mark."""
+        now = time.perf_counter()
+        self.phases[phase] = now - self.last
+        self.last = now
+        if phase == "first paint":
+            self.phases["to first paint"] = now - STARTED
+        self.maybe_report()
+
+    def record(self, phase: str, seconds: float):
+        """For phases that overlap the others, like the background scan."""
+        self.phases[phase] = seconds
+        self.maybe_report()
+
+    def maybe_report(self):
+        if self.enabled and "first paint" in self.phases and "scan" in self.phases:
+            self.report()
+
+    def report(self):
+        lines = [f"{phase:>16}: {seconds * 1000:8.1f} ms" for phase, seconds in self.phases.items()]
+        print("Startup profile\n" + "\n".join(lines), file=sys.stderr)
+        try:
+            write_atomic(PROFILE_FILE, json.dumps({p: round(s * 1000, 1) for p, s in self.phases.items()}, indent=2))
+        except OSError:
+            pass
 
 # ---------------- Main Window ---------------- #
 
 class MainWindow(QMainWindow):
-    def __init__(self, initial_data: dict):
+    def __init__(self, initial_data: dict, store: WriteBehindStore, settings: dict | None = None):
         super().__init__()
         self.setWindowTitle("📚 File Manager")
         self.resize(800, 500)
         self.data = initial_data
+        self.item_index = ItemIndex(self.data)
+        self.store = store
+        # sharded and sqlite storage: {date: count} of older days still on disk, loaded when opened or searched
+        self.unloaded = store.unloaded() if hasattr(store, "unloaded") else {}
+        self.settings = settings or load_settings()
 
         central = QWidget()
         self.setCentralWidget(central)
@@ -280,7 +589,7 @@ class MainWindow(QMainWindow):
         self.search_edit.setPlaceholderText("Search…")
         self.search_timer = QTimer()
         self.search_timer.setSingleShot(True)
-        self.search_timer.timeout.connect(self.refresh_ui)
+        self.search_timer.timeout.connect(self.start_search)
         self.search_edit.textChanged.connect(self.debounce_search)
         root_v.addWidget(self.search_edit)
 
@@ -292,10 +601,20 @@ class MainWindow(QMainWindow):
         self.scroll_layout.setContentsMargins(0, 0, 0, 0)
         self.scroll_layout.setSpacing(8)
         self.scroll_area.setWidget(self.scroll_container)
-        root_v.addWidget(self.scroll_area, 1)
+        self.tree = None
+        if self.settings["list_view"] == "tree":
+            self.tree = ItemTreeView()
+            self.tree.delegate.action.connect(self.run_row_action)
+            self.tree.loader = self.load_group
+            self.tree.menu = self.group_menu
+            self.tree.model_.title = self.row_title
+            root_v.addWidget(self.tree, 1)
+        else:
+            root_v.addWidget(self.scroll_area, 1)
 
         btn_box = QVBoxLayout()
-        for text, icon, func in [("➕ Add File", "", self.add_file), ("📝 Add Note", "", self.add_note), ("🔗 Add Link", "", self.add_link)]:
+        for text, icon, func in [("➕ Add File", "", self.add_file), ("📁 Import Folder", "", self.import_folder),
+                                 ("📝 Add Note", "", self.add_note), ("🔗 Add Link", "", self.add_link)]:
             btn = QPushButton(text)
             btn.setObjectName("actionButton")
             btn.setMinimumHeight(36)
@@ -306,7 +625,47 @@ class MainWindow(QMainWindow):
         btn_frame.setLayout(btn_box)
         root_v.addWidget(btn_frame, 0)
 
-        self.expanded_dates = set()  # Track which date groups are expanded
+        self.sections = {}  # group key -> CollapsibleSection currently shown; they keep their own expanded state
+        self.key_len = {"month": 7, "year": 4}.get(self.settings["group_by"], 10)  # a group key is date[:key_len]
+        self.dates = self.item_index.dates
+        for date in self.unloaded:
+            self.dates.add(date)
+        self.window_end = None  # key of the oldest section rendered so far
+        self.more = False  # older groups left to render when the user scrolls down
+        bar = self.scroll_area.verticalScrollBar()
+        bar.valueChanged.connect(self.maybe_show_more)
+        bar.rangeChanged.connect(lambda lo, hi: self.maybe_show_more(bar.value()))  # window shorter than the view
+        self.index = None  # SearchIndex, built on the search pool by the first search, then kept current by save_data
+        self.hits = ("", None)  # last (query, hits) so one refresh searches once
+        self.search_pool = QThreadPool(self)
+        self.search_pool.setMaxThreadCount(1)  # queued older queries bail out on their own
+        self.search_generation = 0
+        self.search_shown = 0  # generation whose results are currently on screen
+        self.watcher = None
+        self.stream, self.stream_done = None, None  # older days still coming in from store.iter_load()
+        self.on_first_paint = None  # startup profile hook
+        self.scan_label = QLabel()
+        self.scan_bar = QProgressBar()
+        self.scan_bar.setFixedWidth(120)
+        self.scan_bar.setMaximumHeight(12)
+        self.scan_bar.setTextVisible(False)
+        # path -> [status, checked_at, moved_to]
+        self.health = load_cache(HEALTH_CACHE_FILE) if self.settings["path_check"] else {}
+        self.health_thread = None
+        self.broken_btn = QPushButton()
+        self.broken_btn.setFlat(True)
+        self.broken_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.broken_btn.clicked.connect(self.open_broken_paths)
+        self.statusBar().addPermanentWidget(self.broken_btn)
+        self.update_broken_count()
+        self.statusBar().addPermanentWidget(self.scan_label)
+        self.statusBar().addPermanentWidget(self.scan_bar)
+        self.show_scan_progress(None)
+        self.diagnostics = None
+        self.launch_signals = LauncherSignals(self)
+        self.launch_signals.failed.connect(self.show_launch_error)
+        self.launcher = Launcher(self.launch_signals.failed.emit)
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self).activated.connect(self.open_diagnostics)
         self.apply_theme()
         self.refresh_ui()
 
@@ -315,163 +674,650 @@ class MainWindow(QMainWindow):
         self.search_timer.stop()
         self.search_timer.start(300)  # Wait 300ms after user stops typing
 
-    def get_expanded_dates(self) -> set:
-        """Get all currently expanded date groups."""
-        expanded = set()
-        for i in range(self.scroll_layout.count()):
-            widget = self.scroll_layout.itemAt(i).widget()
-            if isinstance(widget, CollapsibleSection) and not widget.collapsed:
-                expanded.add(widget.date)
-        return expanded
-
-    def restore_expanded_state(self, expanded_dates: set):
-        """Restore expanded state for specific dates."""
-        for i in range(self.scroll_layout.count()):
-            widget = self.scroll_layout.itemAt(i).widget()
-            if isinstance(widget, CollapsibleSection):
-                if widget.date in expanded_dates and widget.collapsed:
-                    widget.toggle()
-                elif widget.date not in expanded_dates and not widget.collapsed:
-                    widget.toggle()
-
-    def save_data(self):
+    @METRICS.timed("save_data")
+    def save_data(self, *ops: dict):
+        """Queues just the given mutations; the store writes them in the background once edits pause."""
+        if self.index:
+            for op in ops:
+                self.index.apply(op)
+        self.hits = ("", None)
+        METRICS.count("save_data.ops", len(ops))
+        if self.store.error:
+            self.store.error = None
+            QMessageBox.critical(self, "Error", "Failed to save data. Your changes are kept and will be retried.")
         try:
-            with open(DATA_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
+            self.store.append(list(ops))
+            if self.stream is None:
+                self.store.maybe_compact(self.data)  # a snapshot must hold every day
         except:
             QMessageBox.critical(self, "Error", "Failed to save data.")
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.on_first_paint:
+            callback, self.on_first_paint = self.on_first_paint, None
+            QTimer.singleShot(0, callback)  # after this frame's children have painted too
+
+    def closeEvent(self, event):
+        self.finish_stream(start_rest=False)
+        if self.watcher:
+            self.watcher.stop()
+        if self.health_thread:
+            self.health_worker.health.stop.set()  # it stops after the batch in hand, which is already saved
+            self.health_thread.quit()
+            self.health_thread.wait(2000)
+        try:
+            self.store.close(self.data)
+        except Exception:  # OSError from the journal, sqlite3.Error from the database
+            QMessageBox.critical(self, "Error", "Failed to save data.")
+        super().closeEvent(event)
+
+    def diagnostics_report(self) -> dict:
+        report = METRICS.snapshot()
+        report["enabled"] = METRICS.enabled
+        report["widgets"] = len(QApplication.allWidgets())
+        report["sections"] = len(self.sections)
+        report["row_widgets"] = sum(len(s.row_labels) for s in self.sections.values())
+        report["items"] = sum(map(len, self.data.values()))
+        report["dates_not_loaded"] = len(self.unloaded)
+        return report
+
+    def open_diagnostics(self):
+        if self.diagnostics is None:
+            from file_manager_dialogs import DiagnosticsDialog
+            self.diagnostics = DiagnosticsDialog(self)
+        self.diagnostics.refresh()
+        self.diagnostics.show()
+        self.diagnostics.raise_()
+
+    def known_paths(self) -> dict[str, str]:
+        """path -> id snapshot handed to the background scanner, which must not touch self.data."""
+        return {path: next(iter(ids)) for path, ids in self.item_index.by_path.items()}
+
+    def show_scan_progress(self, percent: int | None, text: str = ""):
+        """Status-bar indicator for the background scan; None hides it."""
+        self.scan_label.setVisible(percent is not None)
+        self.scan_bar.setVisible(percent is not None)
+        if percent is None:
+            return
+        self.scan_bar.setValue(percent)
+        self.scan_label.setText(text)
+
+    def show_scan_summary(self, stats: dict):
+        self.show_scan_progress(None)
+        text = f"Added {stats['new']} new files" if stats["new"] else "Up to date"
+        text += f" · scanned {stats['scanned']}, skipped {stats['skipped']} in {stats['elapsed']:.1f}s"
+        if stats["errors"]:
+            text += f" · {stats['errors']} folders unreachable"
+        self.statusBar().showMessage(text, 8000)
+
+    def merge_scan(self, added: list[dict]) -> int:
+        """Adds the scanner's finds as one batch. Anything the watcher or the user added meanwhile is skipped."""
+        ops = [self.item_index.add(op["date"], op["item"]) for op in added
+               if not self.item_index.find_path(op["item"]["path"])]
+        self.show_scan_progress(None)
+        if not ops:
+            return 0
+        self.save_data(*ops)
+        self.refresh_dates({op["date"] for op in ops})
+        return len(ops)
+
+    def row_title(self, item: dict) -> str:
+        """display_title plus a marker when the path check found the file missing, moved or unreachable."""
+        entry = self.health.get(item["path"]) if "path" in item else None
+        if entry and entry[0] in HEALTH_MARKERS:
+            return f"⚠ {display_title(item)} ({HEALTH_MARKERS[entry[0]]})"
+        return display_title(item)
+
+    def start_path_check(self):
+        """Low-priority pass over the stored paths, started once the Downloads scan is done."""
+        if self.health_thread or not self.settings["path_check"]:
+            return
+        self.health_thread = QThread(self)
+        self.health_worker = PathHealthWorker(list(self.item_index.by_path),
+                                              [r["path"] for r in scan_roots(self.settings)])
+        self.health_worker.moveToThread(self.health_thread)
+        self.health_thread.started.connect(self.health_worker.run)
+        self.health_worker.batch.connect(self.apply_path_health)
+        self.health_worker.finished.connect(self.path_check_done)
+        self.health_thread.start(QThread.Priority.LowestPriority)
+
+    def path_check_done(self, stats: dict):
+        self.health_thread.quit()
+        self.health_thread.wait()
+        self.health_thread = None
+        if stats["checked"]:
+            self.statusBar().showMessage(f"Checked {stats['checked']} file paths", 5000)
+
+    def apply_path_health(self, batch: dict):
+        """Marks only the rows whose status changed; the tree just repaints, its delegate reads the markers."""
+        changed = [p for p, entry in batch.items() if self.health.get(p, [None])[0] != entry[0]]
+        self.health.update(batch)
+        if not changed:
+            return
+        if self.tree:
+            self.tree.viewport().update()
+        else:
+            for path in changed:
+                for date, item in self.item_index.find_path(path):
+                    section = self.sections.get(date[:self.key_len])
+                    if section:
+                        section.update_row(item)
+        self.update_broken_count()
+
+    def broken_items(self) -> list[tuple[str, dict, list]]:
+        return [(date, item, self.health[path]) for path in self.item_index.by_path
+                if self.health.get(path, [None])[0] in ("missing", "moved")
+                for date, item in self.item_index.find_path(path)]
+
+    def update_broken_count(self):
+        count = len(self.broken_items()) if self.health else 0
+        self.broken_btn.setText(f"⚠ {count} files not found")
+        self.broken_btn.setVisible(bool(count))
+
+    def open_broken_paths(self):
+        from file_manager_dialogs import BrokenPathsDialog
+        dlg = BrokenPathsDialog(self.broken_items(), self)
+        if dlg.exec() != QDialog.DialogCode.Accepted:
+            return
+        ops, now = [], time.time()
+        for item, (status, _, moved_to) in dlg.ticked():
+            if not self.item_index.get(item["id"]):
+                continue  # removed meanwhile
+            if dlg.action == "relink" and status == "moved" and moved_to:
+                ops.append(self.item_index.edit(item["id"], {"path": moved_to}))
+                self.health[moved_to] = ["ok", now, None]
+            elif dlg.action == "remove":
+                ops.append(self.item_index.delete(item["id"]))
+        if not ops:
+            return
+        self.save_data(*ops)
+        self.refresh_dates({op["date"] for op in ops})
+        self.update_broken_count()
+
+    def start_watching(self, roots: list[dict]):
+        self.watcher = FolderWatcher(roots, self)
+        self.watcher.changes.connect(self.apply_fs_changes)
+        self.watcher.start()
+
+    def apply_fs_changes(self, events: list):
+        """Applies one batch of watcher events with a single save and a single refresh."""
+        ops, created = [], []
+        for kind, path, new_path in events:
+            path, new_path = normalize_path(path), new_path and normalize_path(new_path)
+            known = self.item_index.find_path(path)
+            if kind == "moved" and known:
+                ops += [self.item_index.edit(item["id"], {"path": new_path}) for _, item in known]
+                continue
+            if kind == "moved":
+                kind, path = "created", new_path  # e.g. report.pdf.crdownload -> report.pdf
+            if (kind == "created" and not self.item_index.find_path(path)
+                    and not path.lower().endswith(PARTIAL_DOWNLOAD_EXTS)):
+                try:
+                    created.append((path, os.stat(path).st_ctime))
+                except OSError:
+                    continue
+            elif kind == "deleted":
+                ops += [self.item_index.delete(item["id"]) for _, item in known]
+        if created and self.settings["content_dedup"] in ("flag", "collapse"):
+            self.check_duplicates(created)
+        else:
+            ops += self.watched_adds(created, {})
+        if not ops:
+            return
+        self.save_data(*ops)
+        self.refresh_dates({op["date"] for op in ops})
+
+    def check_duplicates(self, created: list[tuple[str, float]]):
+        """content_dedup for watcher finds: hashing runs on the thread pool, the adds follow in add_watched."""
+        folders = {os.path.dirname(path) for path, _ in created}
+        known = {p: next(iter(ids)) for p, ids in self.item_index.by_path.items() if os.path.dirname(p) in folders}
+        task = DedupTask(created, known, self.settings["scan_workers"])
+        task.signals.done.connect(self.add_watched)
+        QThreadPool.globalInstance().start(task)
+
+    def watched_adds(self, created: list[tuple[str, float]], dupes: dict[str, str]) -> list[dict]:
+        """Add ops for new files, flagged or dropped like the scanner does when their content is already listed."""
+        ops = []
+        for path, ctime in created:
+            if self.item_index.find_path(path):
+                continue  # the scan got there first
+            original = self.item_index.find_path(dupes[path]) if path in dupes else None
+            if original and self.settings["content_dedup"] == "collapse":
+                continue
+            item = {"id": new_item_id(), "desc": file_title(os.path.basename(path)), "path": path}
+            if original:
+                item["duplicate_of"] = original[0][1]["id"]
+            ops.append(self.item_index.add(str(datetime.date.fromtimestamp(ctime)), item))
+        return ops
+
+    def add_watched(self, created: list[tuple[str, float]], dupes: dict[str, str]):
+        ops = self.watched_adds(created, dupes)
+        if not ops:
+            return
+        self.save_data(*ops)
+        self.refresh_dates({op["date"] for op in ops})
+
     def add_file(self):
         paths, _ = QFileDialog.getOpenFileNames(self, "Select files")
-        if not paths: return
+        if len(paths) > 1:
+            return self.import_paths(paths)
+        if not paths:
+            return
         today = str(datetime.date.today())
-        expanded_dates = self.get_expanded_dates()
-        for p in paths:
-            dlg = TitleInputDialog(p, self)
-            if dlg.exec() == QDialog.DialogCode.Accepted:
-                if today not in self.data: self.data[today] = []
-                self.data[today].append({"desc": dlg.value(), "path": p})
-        self.save_data()
-        self.refresh_ui()
-        self.restore_expanded_state(expanded_dates)
+        from file_manager_dialogs import TitleInputDialog
+        dlg = TitleInputDialog(paths[0], self)
+        if dlg.exec() == QDialog.DialogCode.Accepted:
+            item = {"id": new_item_id(), "desc": dlg.value(), "path": normalize_path(paths[0])}
+            self.save_data(self.item_index.add(today, item))
+            self.refresh_dates({today})
+
+    def import_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Import folder")
+        if folder:
+            self.import_paths([folder])
+
+    def import_paths(self, paths: list[str]):
+        """Bulk import: one title grid, then every add goes out as one save and one refresh."""
+        plan, skipped = plan_import(self.item_index, paths)
+        if not plan:
+            QMessageBox.information(self, "Import", f"Nothing new to import ({len(skipped)} already in the list).")
+            return
+        from file_manager_dialogs import BulkImportDialog
+        dlg = BulkImportDialog(plan, len(skipped), self)
+        if dlg.exec() != QDialog.DialogCode.Accepted:
+            return
+        today = str(datetime.date.today())
+        ops = [self.item_index.add(today, {"id": new_item_id(), "desc": title, "path": path})
+               for path, title in dlg.rows()]
+        if not ops:
+            return
+        self.save_data(*ops)
+        self.refresh_dates({today})
 
     def add_note(self):
         today = str(datetime.date.today())
-        expanded_dates = self.get_expanded_dates()
+        from file_manager_dialogs import NoteDialog
         dlg = NoteDialog(parent=self)
         if dlg.exec() == QDialog.DialogCode.Accepted:
             title, note = dlg.get()
-            if not note: return
-            if today not in self.data: self.data[today] = []
-            self.data[today].append({"title": title, "note": note})
-            self.save_data()
-            self.refresh_ui()
-            self.restore_expanded_state(expanded_dates)
+            if not note:
+                return
+            self.save_data(self.item_index.add(today, {"id": new_item_id(), "title": title, "note": note}))
+            self.refresh_dates({today})
 
     def add_link(self):
         today = str(datetime.date.today())
-        expanded_dates = self.get_expanded_dates()
+        from file_manager_dialogs import LinkDialog
         dlg = LinkDialog(parent=self)
         if dlg.exec() == QDialog.DialogCode.Accepted:
             title, url = dlg.get()
-            if not url: return
-            if today not in self.data: self.data[today] = []
-            self.data[today].append({"desc": title, "url": url})
-            self.save_data()
-            self.refresh_ui()
-            self.restore_expanded_state(expanded_dates)
+            if not url:
+                return
+            self.save_data(self.item_index.add(today, {"id": new_item_id(), "desc": title, "url": url}))
+            self.refresh_dates({today})
+
+    def run_row_action(self, name: str, date: str, item: dict):
+        """Button clicks coming from the tree view delegate."""
+        if name == "open":
+            self.open_file(item["path"])
+        elif name == "link":
+            self.open_link(item["url"])
+        elif name == "note":
+            self.open_note_popup(item["id"])
+        elif name == "rename":
+            self.rename_item(item["id"])
+        elif name == "delete":
+            self.delete_item(item["id"])
 
     def open_file(self, path: str):
-        if not os.path.exists(path): return QMessageBox.critical(self, "Error", "File not found!")
-        os.startfile(path) if os.name == "nt" else subprocess.call(("open", path))
+        self.launcher.open_path(path)
 
-    def open_link(self, url: str): webbrowser.open(url)
+    def open_link(self, url: str):
+        self.launcher.open_url(url)
+
+    def open_all(self, key: str):
+        """Queues every file of a day (or month/year) section; they open one after another in the background."""
+        paths = [f["path"] for f in (self.load_group(key) or self.group_items(key, "")) if "path" in f]
+        if (len(paths) > OPEN_ALL_CONFIRM and QMessageBox.question(self, "Open all", f"Open {len(paths)} files?")
+                != QMessageBox.StandardButton.Yes):
+            return
+        self.launcher.open_all(paths)
 
-    def open_note_popup(self, item: dict):
-        expanded_dates = self.get_expanded_dates()
+    def group_menu(self, key: str, pos):
+        count = sum("path" in f for f in self.group_items(key, ""))
+        menu = QMenu(self)
+        action = menu.addAction(f"Open all {count} files" if count else "Open all files")
+        action.setEnabled(bool(count) or any(d in self.unloaded for d in self.dates.within(key)))
+        action.triggered.connect(lambda: self.open_all(key))
+        menu.exec(pos)
+
+    def show_launch_error(self, target: str, message: str):
+        QMessageBox.critical(self, "Error", f"{message}\n{target}")
+
+    def open_note_popup(self, item_id: str):
+        found = self.item_index.get(item_id)
+        if not found:
+            return
+        item = found[1]
+        from file_manager_dialogs import NoteDialog
         dlg = NoteDialog(item.get("title", "Untitled Note"), item.get("note", ""), self)
-        if dlg.exec() == QDialog.DialogCode.Accepted:
+        if dlg.exec() == QDialog.DialogCode.Accepted and self.item_index.get(item_id):
             title, note = dlg.get()
-            item["title"], item["note"] = title or "Untitled Note", note
-            self.save_data()
-            self.refresh_ui()
-            self.restore_expanded_state(expanded_dates)
+            op = self.item_index.edit(item_id, {"title": title or "Untitled Note", "note": note})
+            self.save_data(op)
+            self.refresh_item(op["date"], item)
 
-    def rename_item(self, date: str, item: dict):
-        expanded_dates = self.get_expanded_dates()
+    def rename_item(self, item_id: str):
+        found = self.item_index.get(item_id)
+        if not found:
+            return
+        item = found[1]
+        from file_manager_dialogs import RenameDialog
         dlg = RenameDialog(item.get("desc", ""), self)
-        if dlg.exec() == QDialog.DialogCode.Accepted:
+        if dlg.exec() == QDialog.DialogCode.Accepted and self.item_index.get(item_id):
             if dlg.value():
-                item["desc"] = dlg.value()
-                self.save_data()
-                self.refresh_ui()
-                self.restore_expanded_state(expanded_dates)
-
-    def delete_item(self, date: str, item: dict):
-        if QMessageBox.question(self, "Delete", "Delete item?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No) == QMessageBox.StandardButton.Yes:
-            expanded_dates = self.get_expanded_dates()
-            self.data[date].remove(item)
-            if not self.data[date]: del self.data[date]
-            self.save_data()
-            self.refresh_ui()
-            self.restore_expanded_state(expanded_dates)
+                op = self.item_index.edit(item_id, {"desc": dlg.value()})
+                self.save_data(op)
+                self.refresh_item(op["date"], item)
 
-    def refresh_ui(self):
-        while self.scroll_layout.count():
-            it = self.scroll_layout.takeAt(0)
-            if it.widget(): it.widget().deleteLater()
+    def delete_item(self, item_id: str):
+        buttons = QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        if QMessageBox.question(self, "Delete", "Delete item?", buttons) == QMessageBox.StandardButton.Yes:
+            if not self.item_index.get(item_id):
+                return  # already gone, e.g. removed by the folder watcher
+            op = self.item_index.delete(item_id)
+            self.save_data(op)
+            self.refresh_dates({op["date"]})
+
+    def load_months(self, months: set):
+        """Pulls older months of a sharded or sqlite store into self.data."""
+        for month in sorted(months):
+            for date, items in self.store.load_month(month).items():
+                self.item_index.merge_day(date, items)
+                if self.index:
+                    for item in items:
+                        self.index.apply({"op": "add", "date": date, "item": item})
+        self.unloaded = {d: n for d, n in self.unloaded.items() if d[:7] not in months}
+
+    def load_group(self, key: str) -> list[dict] | None:
+        """Loads the days of a section that are still on disk; returns its items then, else None."""
+        months = {d[:7] for d in self.dates.within(key) if d in self.unloaded}
+        if not months:
+            return None
+        self.load_months(months)
+        return self.group_items(key, "")
+
+    def stream_days(self, days, then):
+        """Takes the rest of a newest-first load (store.iter_load) a slice per event-loop turn, so the
+        window is usable while older history is still being read. `then` runs once every day is in."""
+        self.stream, self.stream_done = days, then
+        QTimer.singleShot(0, self.stream_step)
+
+    def stream_step(self, limit: int = STREAM_DAYS, start_rest: bool = True):
+        if self.stream is None:
+            return  # finish_stream got there first
+        batch = list(itertools.islice(self.stream, limit))
+        for date, items in batch:
+            self.item_index.merge_day(date, items)
+        if len(batch) < limit:
+            self.stream = None
+        else:
+            QTimer.singleShot(0, self.stream_step)
+        if batch and start_rest:
+            self.show_streamed({date for date, _ in batch})
+        if self.stream is None and start_rest:
+            self.stream_done()
+
+    def finish_stream(self, start_rest: bool = True):
+        """Searching, compacting and closing need every day in memory: read the rest now."""
+        self.stream_step(sys.maxsize, start_rest)
+
+    def show_streamed(self, dates: set):
+        """Streamed days are older than everything on screen: grow a partly shown month/year,
+        fill the window if it isn't full yet, otherwise leave them for scrolling."""
+        if self.tree:
+            return self.refresh_ui()
+        self.refresh_dates({date for date in dates if date[:self.key_len] in self.sections})
+        self.more = True
+        if len(self.sections) < (self.settings["date_window"] or sys.maxsize):
+            self.show_more()
+
+    def start_search(self):
+        """Debounced keystroke: cancel whatever is running and search on the pool."""
+        self.search_generation += 1
+        self.finish_stream()
         query = self.search_edit.text().lower().strip()
-        for date in sorted(self.data.keys(), reverse=True):
-            items = self.data[date]
-            if query:
-                # If query matches the date, show all items for that date
-                if query in date.lower():
-                    filtered = items
-                else:
-                    # Otherwise, filter items that contain the query
-                    filtered = [f for f in items if query in str(f).lower()]
+        if not query:
+            self.search_shown = self.search_generation
+            return self.refresh_ui()
+        if self.unloaded:
+            self.load_months({d[:7] for d in self.unloaded})  # the index has to see everything
+        build_from = None
+        if self.index is None:
+            self.index = SearchIndex()
+            build_from = {d: list(items) for d, items in self.data.items()}
+        scan_from = None if TOKEN_RE.search(query) else {d: list(items) for d, items in self.data.items()}
+        task = SearchTask(self.search_generation, query, self.index, list(self.dates.newest()),
+                          lambda: self.search_generation, build_from, scan_from)
+        task.signals.batch.connect(self.show_search_batch)
+        self.search_pool.start(task)
+
+    @METRICS.timed("search.show_batch")
+    def show_search_batch(self, generation: int, query: str, hits: dict, batch: list, done: bool):
+        if generation != self.search_generation:
+            return  # an older query finishing late
+        if self.search_shown != generation:
+            self.search_shown = generation
+            self.hits = (query, hits)
+            self.more = False  # results stream in below; scrolling must not append unfiltered days
+            if self.tree:
+                self.tree.set_groups([], set())
+            else:
+                self.clear_sections()
+        groups = []
+        for date, whole_day in batch:
+            items = self.data.get(date, [])
+            items = items if whole_day else [f for f in items if f["id"] in hits]
+            if not items:
+                continue
+            key = date[:self.key_len]
+            if groups and groups[-1][0] == key:
+                groups[-1][1].extend(items)  # batches come newest first
+            else:
+                groups.append((key, list(items) if self.key_len < 10 else items))
+        if self.tree:
+            return self.tree.append_groups(groups)
+        for key, items in groups:
+            section = self.sections.get(key)
+            if section:  # a month/year the previous batch already started
+                section.items = section.items + items
+                section.refresh_rows()
             else:
-                filtered = items
-            if not filtered: continue
-            section = CollapsibleSection(date, filtered, self)
-            if query: section.expand()
-            self.scroll_layout.addWidget(section)
+                self.add_section(key, items, expand=True)
+
+    def search_hits(self, query: str) -> dict[str, str] | None:
+        if self.hits[0] != query or self.hits[1] is None:
+            if self.index is None:
+                return None  # first search still pending, callers fall back to a scan
+            self.hits = (query, self.index.search(query))
+        return self.hits[1]
+
+    def filter_items(self, date: str, query: str) -> list[dict]:
+        items = self.data.get(date, [])
+        # If query matches the date, show all items for that date
+        if not query or query in date.lower():
+            return items
+        # Otherwise, filter items that contain the query
+        hits = self.search_hits(query)
+        if hits is None:
+            return [f for f in items if query in str(f).lower()]  # punctuation-only query
+        return [f for f in items if f["id"] in hits]
+
+    def group_items(self, key: str, query: str) -> list[dict]:
+        """Items of a day, or of every day in a month/year key, that match the query."""
+        if len(key) == 10:
+            return self.filter_items(key, query)
+        return [f for date in self.dates.within(key) for f in self.filter_items(date, query)]
+
+    def filtered_groups(self, query: str, before: str | None = None):
+        """(group key, items) newest first, lazily, from the ordered date index; `before` resumes below
+        a key already shown. Days whose month is still on disk come through as empty placeholders."""
+        hits = self.search_hits(query) if query else None
+        hit_dates = set(hits.values()) if hits is not None else None
+        key = None
+        for date in self.dates.newest(before):
+            if date[:self.key_len] == key:
+                continue  # rest of a month/year already yielded
+            if self.key_len == 10 and hit_dates is not None and date not in hit_dates and query not in date.lower():
+                continue
+            key = date[:self.key_len]
+            filtered = self.group_items(key, query)
+            if filtered or (not query and any(d in self.unloaded for d in self.dates.within(key))):
+                yield key, filtered
+
+    def clear_sections(self):
+        while self.scroll_layout.count():
+            it = self.scroll_layout.takeAt(0)
+            if it.widget():
+                it.widget().deleteLater()
+        self.sections = {}
         self.scroll_layout.addItem(QSpacerItem(1, 1, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding))
 
+    def add_section(self, date: str, items: list[dict], expand: bool = False, pos: int | None = None):
+        section = CollapsibleSection(date, items, self)
+        if expand:
+            section.expand()
+        # the spacer stays last
+        self.scroll_layout.insertWidget(self.scroll_layout.count() - 1 if pos is None else pos, section)
+        self.sections[date] = section
+
+    @METRICS.timed("refresh_ui")
+    def refresh_ui(self):
+        """Full synchronous rebuild for the current query. Typing goes through start_search,
+        mutations through refresh_dates."""
+        query = self.search_edit.text().lower().strip()
+        if self.tree:
+            return self.tree.set_groups(list(self.filtered_groups(query)), self.tree.expanded_dates(),
+                                        expand_all=bool(query))
+        self.clear_sections()
+        self.window_end, self.more = None, True
+        self.show_more()
+
+    def show_more(self):
+        """Renders the next date_window sections below the oldest one on screen."""
+        if not self.more:
+            return
+        query = self.search_edit.text().lower().strip()
+        window = self.settings["date_window"] or len(self.dates) + 1
+        groups = list(itertools.islice(self.filtered_groups(query, self.window_end), window + 1))
+        self.more = len(groups) > window
+        for key, filtered in groups[:window]:
+            self.add_section(key, filtered, expand=bool(query))
+            self.window_end = key
+
+    def maybe_show_more(self, value: int):
+        bar = self.scroll_area.verticalScrollBar()
+        if self.more and not self.tree and value >= bar.maximum() - bar.pageStep() // 2:
+            self.show_more()
+
+    @METRICS.timed("refresh_dates")
+    def refresh_dates(self, dates: set):
+        """Patches only the sections of `dates`: updates, inserts or removes them. Other sections,
+        and their expanded state, are left alone."""
+        if self.tree:
+            return self.refresh_ui()  # a model reset is cheap, the view has no row widgets
+        query = self.search_edit.text().lower().strip()
+        for key in {date[:self.key_len] for date in dates}:
+            filtered = self.group_items(key, query)
+            section = self.sections.get(key)
+            if section and filtered:
+                section.items = filtered
+                section.refresh_rows()
+            elif section:
+                self.scroll_layout.removeWidget(section)
+                section.deleteLater()
+                del self.sections[key]
+            elif filtered and (not self.more or key > self.window_end):  # below the window it shows up on scroll
+                self.add_section(key, filtered, expand=bool(query), pos=sum(1 for k in self.sections if k > key))
+
+    def refresh_item(self, date: str, item: dict):
+        """After a rename / note edit: relabel one row if it still matches the search, else patch its day."""
+        section = self.sections.get(date[:self.key_len])
+        query = self.search_edit.text().lower().strip()
+        if self.tree or not section or (query and item not in self.filter_items(date, query)):
+            return self.refresh_dates({date})
+        section.update_row(item)
+
     def apply_theme(self):
         self.setStyleSheet("""
             QMainWindow, QWidget { background: #f5f5f5; color: #111; font-family: "Segoe UI"; }
-            QLineEdit, QPlainTextEdit { padding: 6px 8px; border-radius: 6px; border: 1px solid #c9c9c9; background: #fff; }
-            QPushButton#actionButton { background: #000; color: #fff; font-weight: 600; border-radius: 8px; padding: 8px; }
-            QPushButton#rowButton { background: #0B5ED7; color: #fff; font-weight: 600; border-radius: 6px; padding: 6px; }
-            QPushButton#headerButton { background: #e9ecef; border: 1px solid #d0d4d9; border-radius: 8px; text-align: left; padding: 10px; font-weight: 600; }
-            QScrollBar:vertical { background: #666; width: 18px; border-radius: 6px; margin-left: 5px; margin-right: 5px; }
+            QLineEdit { padding: 6px 8px; border-radius: 6px; border: 1px solid #c9c9c9; background: #fff; }
+            QPushButton#actionButton {
+                background: #000; color: #fff; font-weight: 600; border-radius: 8px; padding: 8px;
+            }
+            QPushButton#rowButton {
+                background: #0B5ED7; color: #fff; font-weight: 600; border-radius: 6px; padding: 6px;
+            }
+            QPushButton#headerButton {
+                background: #e9ecef; border: 1px solid #d0d4d9; border-radius: 8px; text-align: left;
+                padding: 10px; font-weight: 600;
+            }
+            QScrollBar:vertical {
+                background: #666; width: 18px; border-radius: 6px; margin-left: 5px; margin-right: 5px;
+            }
             QScrollBar::handle:vertical { background: #333; border-radius: 3px; }
             QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical { background: transparent; border: none; }
+            QTreeView { border: none; outline: none; }
+            QProgressBar { border: 1px solid #c9c9c9; border-radius: 5px; background: #fff; }
+            QProgressBar::chunk { background-color: #0B5ED7; border-radius: 4px; }
         """)
 
 def main():
+    profile = StartupProfile("--profile" in sys.argv or os.environ.get("FILE_MANAGER_PROFILE") == "1")
     app = QApplication(sys.argv)
-    loading = LoadingScreen()
-    loading.show()
-    
+    profile.mark("qt init")  # includes defining everything above
+    settings = load_settings()
+    METRICS.enabled = bool(settings["diagnostics"])
+    store = WriteBehindStore(open_store(settings))
+    # newest days first: the window is built from the first slice, the rest streams in behind it
+    days = store.iter_load() if hasattr(store, "iter_load") else iter(sorted(store.load().items(), reverse=True))
+    data = dict(itertools.islice(days, STREAM_DAYS))
+    profile.mark("data load")
+    METRICS.record("load_data", profile.phases["data load"])
+    # the window comes straight from what is saved; the scan catches up behind it
+    global main_win
+    main_win = MainWindow(data, store, settings)
+    profile.mark("window build")
+    main_win.on_first_paint = lambda: profile.mark("first paint")
+    main_win.show()
     thread = QThread()
-    worker = FileScannerWorker()
-    worker.moveToThread(thread)
-    thread.started.connect(worker.run)
-    worker.progress.connect(loading.update_progress)
-    
-    def on_finished(updated_data):
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(updated_data, f, indent=2, ensure_ascii=False)
-        loading.close()
-        global main_win
-        main_win = MainWindow(updated_data)
-        main_win.show()
-        thread.quit()
-
-    worker.finished.connect(on_finished)
-    thread.start()
+
+    def start_rest():
+        """Once every day is loaded: the watcher and the scan need the full list of known paths."""
+        profile.record("to full data", time.perf_counter() - STARTED)
+        if settings["watch"]:
+            main_win.start_watching(scan_roots(settings))
+        worker = FileScannerWorker(store, scan_roots(settings), settings["scan_workers"], settings["content_dedup"],
+                                   main_win.known_paths())
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.progress.connect(main_win.show_scan_progress)
+        worker.summary.connect(main_win.show_scan_summary)
+        worker.summary.connect(lambda stats: profile.record("scan", stats["elapsed"]))
+        main_win.show_scan_progress(0, "Scanning…")
+
+        def on_finished(added):
+            main_win.merge_scan(added)
+            store.append([], after=worker.commit_cache)  # queued behind the merged ops, so it runs once they are saved
+            thread.quit()
+            main_win.start_path_check()  # only now, so it never competes with the scan for the disk
+
+        worker.finished.connect(on_finished)
+        main_win.scan_worker = worker  # keeps the worker alive once this function returns
+        thread.start()
+
+    main_win.stream_days(days, start_rest)
     sys.exit(app.exec())
 
 if __name__ == "__main__":
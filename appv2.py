@@ -19,11 +19,10 @@
 import tkinter as tk
 from tkinter import filedialog, simpledialog, messagebox, ttk
 import os
-import json
 import datetime
-import subprocess
+from collections import deque
 
-DATA_FILE = "file_data.json"
+from file_manager_core import Library, Launcher, new_item_id, display_title, normalize_path
 
 
 class FileManagerApp:
@@ -33,7 +32,15 @@ class FileManagerApp:
         self.root.geometry("800x500")
         self.root.configure(bg="#f5f5f5")
 
-        self.data = self.load_data()
+        self.library = Library()
+        self.library.load_everything()
+        self.data = self.library.data
+        self.items = self.library.items
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        # Tk may only be touched from its own thread, so launcher errors wait here for check_launches
+        self.launch_errors = deque()
+        self.launcher = Launcher(lambda target, message: self.launch_errors.append((target, message)))
+        self.check_launches()
         self.search_var = tk.StringVar()
         self.search_var.trace("w", lambda *args: self.refresh_ui())  # live search
 
@@ -70,15 +77,19 @@ class FileManagerApp:
 
         self.refresh_ui()
 
-    def load_data(self):
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, "r") as f:
-                return json.load(f)
-        return {}
+    def save_data(self, *ops):
+        try:
+            self.library.commit(*ops)
+        except PermissionError:
+            messagebox.showerror("Error", "Permission denied writing file_data.json.\n"
+                                          "Place the app in a folder where you have write access.")
 
-    def save_data(self):
-        with open(DATA_FILE, "w") as f:
-            json.dump(self.data, f, indent=2)
+    def close(self):
+        try:
+            self.library.close()
+        except Exception:
+            messagebox.showerror("Error", "Failed to save data.")
+        self.root.destroy()
 
     def add_file(self):
         filepaths = filedialog.askopenfilenames()
@@ -87,9 +98,9 @@ class FileManagerApp:
 
         today = str(datetime.date.today())
 
-        for path in filepaths:
+        for path in map(normalize_path, filepaths):
             # Prevent duplicates for the same date
-            if today in self.data and any("path" in f and f["path"] == path for f in self.data[today]):
+            if any(date == today for date, _ in self.items.find_path(path)):
                 messagebox.showwarning("Duplicate", f"{os.path.basename(path)} is already added today.")
                 continue
 
@@ -108,11 +119,7 @@ class FileManagerApp:
                 if not desc:
                     desc = os.path.basename(path)
 
-                if today not in self.data:
-                    self.data[today] = []
-
-                self.data[today].append({"desc": desc, "path": path})
-                self.save_data()
+                self.save_data(self.items.add(today, {"id": new_item_id(), "desc": desc, "path": path}))
                 self.refresh_ui()
                 title_window.destroy()
 
@@ -142,10 +149,7 @@ class FileManagerApp:
                 messagebox.showwarning("Empty Note", "Note text cannot be empty.")
                 return
 
-            if today not in self.data:
-                self.data[today] = []
-            self.data[today].append({"desc": desc, "note": note_text})
-            self.save_data()
+            self.save_data(self.items.add(today, {"id": new_item_id(), "title": desc, "note": note_text}))
             self.refresh_ui()
             note_window.destroy()
 
@@ -173,10 +177,7 @@ class FileManagerApp:
                 messagebox.showwarning("Empty URL", "URL cannot be empty.")
                 return
 
-            if today not in self.data:
-                self.data[today] = []
-            self.data[today].append({"desc": title, "url": url})
-            self.save_data()
+            self.save_data(self.items.add(today, {"id": new_item_id(), "desc": title, "url": url}))
             self.refresh_ui()
             link_window.destroy()
 
@@ -189,16 +190,8 @@ class FileManagerApp:
         query = self.search_var.get().lower().strip()
         search_mode = bool(query)
 
-        for date, items in sorted(self.data.items(), reverse=True):
-            # Filter items by search
-            filtered_items = [
-                f for f in items
-                if query in f["desc"].lower()
-                or ("path" in f and query in os.path.basename(f["path"]).lower())
-                or ("note" in f and query in f.get("note", "").lower())
-                or ("url" in f and query in f.get("url", "").lower())
-            ] if query else items
-
+        groups = self.library.search(query) if query else sorted(self.data.items(), reverse=True)
+        for date, filtered_items in groups:
             if not filtered_items:
                 continue
 
@@ -208,29 +201,25 @@ class FileManagerApp:
             section.pack(fill="x", pady=4, padx=5)
 
     def open_file(self, path):
-        if os.path.exists(path):
-            if os.name == "nt":  # Windows
-                os.startfile(path)
-            elif os.name == "posix":  # macOS/Linux
-                try:
-                    subprocess.call(("open", path))  # macOS
-                except Exception:
-                    subprocess.call(("xdg-open", path))  # Linux
-        else:
-            messagebox.showerror("Error", "File not found!")
+        self.launcher.open_path(path)
 
     def open_link(self, url):
-        import webbrowser
-        webbrowser.open(url)
+        self.launcher.open_url(url)
+
+    def check_launches(self):
+        while self.launch_errors:
+            target, message = self.launch_errors.popleft()
+            messagebox.showerror("Error", f"{message}\n{target}")
+        self.root.after(250, self.check_launches)
 
     def open_note_popup(self, file_item):
         note_window = tk.Toplevel(self.root)
-        note_window.title(f"📝 {file_item['desc']}")
+        note_window.title(f"📝 {display_title(file_item)}")
         note_window.geometry("400x580")
 
         ttk.Label(note_window, text="Title:").pack(anchor="w", padx=10, pady=5)
         desc_entry = ttk.Entry(note_window, font=("Segoe UI", 12), width=40)
-        desc_entry.insert(0, file_item["desc"])
+        desc_entry.insert(0, display_title(file_item))
         desc_entry.pack(fill="x", padx=10, pady=5)
 
         ttk.Label(note_window, text="Note:").pack(anchor="w", padx=10, pady=5)
@@ -239,9 +228,8 @@ class FileManagerApp:
         text_area.pack(fill="both", expand=True, padx=10, pady=10)
 
         def save_changes():
-            file_item["desc"] = desc_entry.get().strip() or "Untitled Note"
-            file_item["note"] = text_area.get("1.0", "end-1c")
-            self.save_data()
+            self.save_data(self.items.edit(file_item["id"], {"title": desc_entry.get().strip() or "Untitled Note",
+                                                             "note": text_area.get("1.0", "end-1c")}))
             self.refresh_ui()
             note_window.destroy()
 
@@ -262,20 +250,16 @@ class FileManagerApp:
         def save_rename():
             new_title = entry.get().strip()
             if new_title:
-                file_item["desc"] = new_title
-                self.save_data()
+                self.save_data(self.items.edit(file_item["id"], {"desc": new_title}))
                 self.refresh_ui()
                 rename_window.destroy()
 
         ttk.Button(rename_window, text="Save", command=save_rename).pack(pady=10)
 
     def delete_item(self, date, file_item):
-        confirm = messagebox.askyesno("Delete", f"Delete {file_item['desc']}?")
+        confirm = messagebox.askyesno("Delete", f"Delete {display_title(file_item)}?")
         if confirm:
-            self.data[date].remove(file_item)
-            if not self.data[date]:
-                del self.data[date]
-            self.save_data()
+            self.save_data(self.items.delete(file_item["id"]))
             self.refresh_ui()
 
 
@@ -323,7 +307,7 @@ class CollapsibleSection(ttk.Frame):
         self.container.grid_columnconfigure(3, weight=0)
 
         for r, file_item in enumerate(self.items):
-            ttk.Label(self.container, text=file_item["desc"], anchor="w").grid(
+            ttk.Label(self.container, text=display_title(file_item), anchor="w").grid(
                 row=r, column=0, sticky="w", padx=5, pady=2
             )
 
@@ -8,9 +8,9 @@
 # (at your option) any later version. https://www.gnu.org/licenses/
 
 from __future__ import annotations
-import sys, os, json, datetime, subprocess, webbrowser
+import sys, os, datetime
 
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtCore import Qt, QSize, QObject, pyqtSignal
 from PyQt6.QtGui import QFont
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QMainWindow, QVBoxLayout, QHBoxLayout, QGridLayout,
@@ -19,12 +19,12 @@ from PyQt6.QtWidgets import (
     QSizePolicy
 )
 
-# ---- data location next to .py / .exe ----
-if getattr(sys, "frozen", False):
-    BASE_DIR = os.path.dirname(sys.executable)
-else:
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_FILE = os.path.join(BASE_DIR, "file_data.json")
+from file_manager_core import Library, Launcher, new_item_id, normalize_path
+
+
+class LauncherSignals(QObject):
+    """Carries launcher errors from its worker thread back to the GUI thread."""
+    failed = pyqtSignal(str, str)
 
 
 # ---------------- Dialogs ---------------- #
@@ -213,23 +213,23 @@ class CollapsibleSection(QFrame):
                 self.grid.addWidget(add_btn("Open",
                     lambda _, p=f["path"]: self.app.open_file(p)), r, 1)
                 self.grid.addWidget(add_btn("Rename",
-                    lambda _, d=self.date, it=f: self.app.rename_item(d, it)), r, 2)
+                    lambda _, i=f["id"]: self.app.rename_item(i)), r, 2)
                 self.grid.addWidget(add_btn("Delete",
-                    lambda _, d=self.date, it=f: self.app.delete_item(d, it)), r, 3)
+                    lambda _, i=f["id"]: self.app.delete_item(i)), r, 3)
 
             elif "note" in f:
                 self.grid.addWidget(add_btn("View Note",
-                    lambda _, it=f: self.app.open_note_popup(it)), r, 1, 1, 2)
+                    lambda _, i=f["id"]: self.app.open_note_popup(i)), r, 1, 1, 2)
                 self.grid.addWidget(add_btn("Delete",
-                    lambda _, d=self.date, it=f: self.app.delete_item(d, it)), r, 3)
+                    lambda _, i=f["id"]: self.app.delete_item(i)), r, 3)
 
             elif "url" in f:
                 self.grid.addWidget(add_btn("Open Link",
                     lambda _, u=f["url"]: self.app.open_link(u)), r, 1)
                 self.grid.addWidget(add_btn("Rename",
-                    lambda _, d=self.date, it=f: self.app.rename_item(d, it)), r, 2)
+                    lambda _, i=f["id"]: self.app.rename_item(i)), r, 2)
                 self.grid.addWidget(add_btn("Delete",
-                    lambda _, d=self.date, it=f: self.app.delete_item(d, it)), r, 3)
+                    lambda _, i=f["id"]: self.app.delete_item(i)), r, 3)
 
 
 # ---------------- Main Window ---------------- #
@@ -302,48 +302,66 @@ class MainWindow(QMainWindow):
         root_v.addWidget(btn_frame, 0)
 
         # ---- load data + style ----
-        self.data = self.load_data()
+        self.launch_signals = LauncherSignals(self)
+        self.launch_signals.failed.connect(lambda target, message: QMessageBox.critical(self, "Error", f"{message}\n{target}"))
+        self.launcher = Launcher(self.launch_signals.failed.emit)
+        self.library = self.open_library()
+        self.data = self.library.data
+        self.item_index = self.library.items
         self.apply_theme()
         self.refresh_ui()
 
     # ---------- Data ---------- #
-    def load_data(self):
-        if os.path.exists(DATA_FILE):
-            try:
-                with open(DATA_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except Exception:
-                return {}
-        return {}
-
-    def save_data(self):
+    def open_library(self) -> Library:
+        """Same settings.json and storage as V3.2; this window has no lazy months, so it loads them all."""
+        library = Library()
+        library.load_everything()
+        return library
+
+    def save_data(self, *ops: dict):
+        """Hands the given mutations to the shared store instead of rewriting file_data.json."""
         try:
-            with open(DATA_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
+            self.library.commit(*ops)
         except PermissionError:
             QMessageBox.critical(self, "Error",
                                  "Permission denied writing file_data.json.\n"
                                  "Place the app in a folder where you have write access.")
 
+    def closeEvent(self, event):
+        try:
+            self.library.close()
+        except Exception:
+            QMessageBox.critical(self, "Error", "Failed to save data.")
+        super().closeEvent(event)
+
     # ---------- Actions ---------- #
     def add_file(self):
         paths, _ = QFileDialog.getOpenFileNames(self, "Select files")
         if not paths:
             return
+        if len(paths) > 1:
+            self.import_files(paths)
+            return
         today = str(datetime.date.today())
-        for p in paths:
+        ops = []
+        for p in map(normalize_path, paths):
             # Prevent duplicates for same date
-            if today in self.data and any(("path" in it and it["path"] == p) for it in self.data[today]):
+            if any(date == today for date, _ in self.item_index.find_path(p)):
                 QMessageBox.warning(self, "Duplicate",
                                     f"{os.path.basename(p)} is already added today.")
                 continue
             dlg = TitleInputDialog(p, self)
             if dlg.exec() == QDialog.DialogCode.Accepted:
                 desc = dlg.value()
-                if today not in self.data:
-                    self.data[today] = []
-                self.data[today].append({"desc": desc, "path": p})
-        self.save_data()
+                ops.append(self.item_index.add(today, {"id": new_item_id(), "desc": desc, "path": p}))
+        self.save_data(*ops)
+        self.refresh_ui()
+
+    def import_files(self, paths: list[str]):
+        """Several files at once: automatic titles, no dialog per file, one save and one refresh."""
+        ops, skipped = self.library.import_files(paths)
+        if skipped:
+            QMessageBox.information(self, "Import", f"Added {len(ops)} files, {len(skipped)} were already in the list.")
         self.refresh_ui()
 
     def add_note(self):
@@ -354,10 +372,7 @@ class MainWindow(QMainWindow):
             if not note:
                 QMessageBox.warning(self, "Empty Note", "Note text cannot be empty.")
                 return
-            if today not in self.data:
-                self.data[today] = []
-            self.data[today].append({"title": title, "note": note})
-            self.save_data()
+            self.save_data(self.item_index.add(today, {"id": new_item_id(), "title": title, "note": note}))
             self.refresh_ui()
 
     def add_link(self):
@@ -368,28 +383,21 @@ class MainWindow(QMainWindow):
             if not url:
                 QMessageBox.warning(self, "Empty URL", "URL cannot be empty.")
                 return
-            if today not in self.data:
-                self.data[today] = []
-            self.data[today].append({"desc": title, "url": url})
-            self.save_data()
+            self.save_data(self.item_index.add(today, {"id": new_item_id(), "desc": title, "url": url}))
             self.refresh_ui()
 
     def open_file(self, path: str):
-        if not os.path.exists(path):
-            QMessageBox.critical(self, "Error", "File not found!")
-            return
-        if os.name == "nt":
-            os.startfile(path)  # type: ignore[attr-defined]
-        elif os.name == "posix":
-            try:
-                subprocess.call(("open", path))
-            except Exception:
-                subprocess.call(("xdg-open", path))
+        """Checked and opened on the launcher thread, so a slow drive or opener never freezes the window."""
+        self.launcher.open_path(path)
 
     def open_link(self, url: str):
-        webbrowser.open(url)
+        self.launcher.open_url(url)
 
-    def open_note_popup(self, item: dict):
+    def open_note_popup(self, item_id: str):
+        found = self.item_index.get(item_id)
+        if not found:
+            return
+        item = found[1]
         dlg = NoteDialog(
             item.get("title", "Untitled Note"),
             item.get("note", ""),
@@ -397,28 +405,28 @@ class MainWindow(QMainWindow):
         )
         if dlg.exec() == QDialog.DialogCode.Accepted:
             title, note = dlg.get()
-            item["title"] = title or "Untitled Note"
-            item["note"] = note
-            self.save_data()
+            self.save_data(self.item_index.edit(item_id, {"title": title or "Untitled Note", "note": note}))
             self.refresh_ui()
 
-    def rename_item(self, date: str, item: dict):
-        dlg = RenameDialog(item.get("desc", ""), self)
+    def rename_item(self, item_id: str):
+        found = self.item_index.get(item_id)
+        if not found:
+            return
+        dlg = RenameDialog(found[1].get("desc", ""), self)
         if dlg.exec() == QDialog.DialogCode.Accepted:
             new_title = dlg.value()
             if new_title:
-                item["desc"] = new_title
-                self.save_data()
+                self.save_data(self.item_index.edit(item_id, {"desc": new_title}))
                 self.refresh_ui()
 
-    def delete_item(self, date: str, item: dict):
-        confirm = QMessageBox.question(self, "Delete", f"Delete {item.get('desc','item')}?",
+    def delete_item(self, item_id: str):
+        found = self.item_index.get(item_id)
+        if not found:
+            return
+        confirm = QMessageBox.question(self, "Delete", f"Delete {found[1].get('desc','item')}?",
                                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if confirm == QMessageBox.StandardButton.Yes:
-            self.data[date].remove(item)
-            if not self.data[date]:
-                del self.data[date]
-            self.save_data()
+            self.save_data(self.item_index.delete(item_id))
             self.refresh_ui()
 
     # ---------- UI refresh ---------- #
@@ -433,24 +441,17 @@ class MainWindow(QMainWindow):
         query = (self.search_edit.text() or "").lower().strip()
         search_mode = bool(query)
 
-        # sort dates descending
-        for date in sorted(self.data.keys(), reverse=True):
-            items = self.data[date]
-            if query:
-                filtered = [
-                    f for f in items
-                    if (query in f.get("desc", "").lower())
-                    or ("path" in f and query in os.path.basename(f["path"]).lower())
-                    or ("note" in f and query in f.get("note", "").lower())
-                    or ("url" in f and query in f.get("url", "").lower())
-                ]
-            else:
-                filtered = items
+        # newest first; a search goes through the same index as the other front ends
+        if search_mode:
+            groups = self.library.search(query)
+        else:
+            groups = [(date, self.data[date]) for date in sorted(self.data.keys(), reverse=True)]
 
-            if not filtered:
+        for date, items in groups:
+            if not items:
                 continue
 
-            section = CollapsibleSection(date, filtered, self)
+            section = CollapsibleSection(date, items, self)
             if search_mode:
                 section.expand()
             self.scroll_layout.addWidget(section)
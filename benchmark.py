@@ -0,0 +1,219 @@
+"""Headless benchmarks for File Manager V3.2: store load/save, Downloads scan, search and UI rebuild.
+
+    python benchmark.py                          # 1k, 10k and 100k items
+    python benchmark.py --sizes 1000,1000000 --files 20000 --out bench.json
+
+Everything runs on synthetic data in a temporary folder; your own file_data.json is never touched.
+Store, scan and search only need file_manager_core; PyQt6 is imported for the UI benchmarks alone.
+Results are written as JSON so two releases can be compared run against run.
+"""
+from __future__ import annotations
+import os, sys, json, time, random, shutil, argparse, platform, tempfile, datetime, importlib.util
+
+import file_manager_core as core
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")  # UI benchmarks without a display
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "File_Manager_APP.V.3.2.py")
+STORAGES = ("journal", "binary", "sharded", "sqlite")
+QUERIES = ("report", "pdf", "zz", "2024-0", "meeting notes")
+WORDS = ("report", "invoice", "lecture", "notes", "math", "bio", "english", "project", "draft", "final",
+         "scan", "photo", "meeting", "budget", "slides", "chapter", "homework", "receipt", "contract", "summary")
+EXTS = ("pdf", "docx", "png", "jpg", "zip", "txt", "xlsx", "mp4", "pptx", "csv")
+
+def load_app():
+    """The app file name isn't importable as-is, so load it by path (its main() stays behind __main__)."""
+    spec = importlib.util.spec_from_file_location("file_manager_app", APP_FILE)
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    return app
+
+def timed(fn, repeat: int = 3) -> float:
+    """Best of `repeat` runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+# ---------------- Synthetic data ---------------- #
+
+def words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+def note_text(rng: random.Random) -> str:
+    """Mostly short notes, now and then a long one (lognormal, roughly 20 to 5000 characters)."""
+    length = min(5000, max(20, int(rng.lognormvariate(5, 1.2))))
+    text = []
+    while sum(map(len, text)) < length:
+        text.append(words(rng, rng.randint(4, 14)) + ".")
+    return " ".join(text)[:length]
+
+def make_store_data(n_items: int, seed: int = 1) -> dict:
+    """n_items spread over many days (about 20 per day, going back from today): 70% files, 15% notes, 15% links."""
+    rng = random.Random(seed)
+    days = max(1, n_items // 20)
+    today = datetime.date.today()
+    data = {}
+    for i in range(n_items):
+        date = str(today - datetime.timedelta(days=rng.randrange(days)))
+        kind = rng.random()
+        item_id = f"{i:012x}"
+        if kind < 0.70:
+            name = f"{words(rng, rng.randint(1, 3)).replace(' ', '_')}_{i}"
+            ext = rng.choice(EXTS)
+            item = {"id": item_id, "desc": f"{name} ({ext.upper()})", "path": f"C:/Users/me/Downloads/{name}.{ext}"}
+        elif kind < 0.85:
+            item = {"id": item_id, "title": words(rng, rng.randint(1, 4)).title(), "note": note_text(rng)}
+        else:
+            item = {"id": item_id, "desc": words(rng, rng.randint(1, 4)).title(),
+                    "url": f"https://example.com/{rng.choice(WORDS)}/{i}"}
+        data.setdefault(date, []).append(item)
+    return data
+
+def make_downloads(root: str, n_files: int, depth: int = 2, fanout: int = 8, seed: int = 2):
+    """A Downloads-like tree: most files at the top, the rest spread over `fanout`^`depth` subfolders."""
+    rng = random.Random(seed)
+    folders, level = [root], [root]
+    for _ in range(depth):
+        level = [os.path.join(f, f"folder_{j}") for f in level for j in range(fanout)]
+        folders += level
+    for f in folders:
+        os.makedirs(f, exist_ok=True)
+    for i in range(n_files):
+        folder = root if rng.random() < 0.6 else rng.choice(folders)
+        name = f"{rng.choice(WORDS)}_{i}{rng.choice(['', ' (1)'])}.{rng.choice(EXTS)}"
+        with open(os.path.join(folder, name), "wb") as f:
+            f.write(rng.randbytes(rng.randint(0, 4096)))
+
+# ---------------- Benchmarks ---------------- #
+
+def open_bench_store(storage: str, folder: str):
+    if storage == "sqlite":
+        return core.SqliteStore(os.path.join(folder, "file_data.db"))
+    if storage == "sharded":
+        return core.ShardedStore(os.path.join(folder, "file_data.shards"))
+    if storage == "binary":
+        return core.JournalStore(os.path.join(folder, "file_data.bin"), os.path.join(folder, "file_data.bin.journal"),
+                                 binary=True)
+    return core.JournalStore(os.path.join(folder, "file_data.json"), os.path.join(folder, "file_data.journal"))
+
+def write_store(storage: str, folder: str, data: dict):
+    store = open_bench_store(storage, folder)
+    store.replace_all(data)
+    store.close(data)
+
+def bench_store(storage: str, data: dict, folder: str, results: list, n: int):
+    os.makedirs(folder)
+    write_store(storage, folder, data)
+    loaded = {}
+    load_time = timed(lambda: loaded.update(data=open_bench_store(storage, folder).load()))
+    results.append({"bench": "load", "storage": storage, "items": n, "seconds": load_time})
+
+    store = open_bench_store(storage, folder)
+    live = store.load()
+    index = core.ItemIndex(live)
+    ids = [it["id"] for items in live.values() for it in items][:100]
+    edits = [index.edit(i, {"desc": f"renamed {k}"}) for k, i in enumerate(ids)]
+    results.append({"bench": "save_batch", "storage": storage, "items": n, "ops": len(edits),
+                    "seconds": timed(lambda: store.append(edits), repeat=1)})
+    results.append({"bench": "save_single", "storage": storage, "items": n,
+                    "seconds": timed(lambda: store.append(edits[:1]), repeat=1)})
+    if isinstance(store, core.JournalStore):
+        results.append({"bench": "snapshot", "storage": storage, "items": n,
+                        "seconds": timed(lambda: store._write_snapshot(live), repeat=1)})
+    store.close(live)
+
+def bench_scan(folder: str, n_files: int, results: list):
+    downloads = os.path.join(folder, "Downloads")
+    os.makedirs(folder)
+    make_downloads(downloads, n_files)
+    core.SCAN_CACHE_FILE = os.path.join(folder, "scan_cache.json")
+    core.HASH_CACHE_FILE = os.path.join(folder, "hash_cache.json")
+    roots = core.scan_roots({"scan_roots": [{"path": downloads, "recursive": True}]})
+    for label, known in (("scan_cold", {}), ("scan_warm", {"x": "x"})):  # a non-empty store uses the scan cache
+        store = core.JournalStore(os.path.join(folder, "scan.json"), os.path.join(folder, "scan.journal"))
+        scanner = core.Scanner(store, roots, 4, "off", known)
+        added = []
+        seconds = timed(lambda: added.extend(scanner.run()[0]), repeat=1)
+        scanner.commit_cache()
+        store.close({})
+        results.append({"bench": label, "files": n_files, "added": len(added), "seconds": seconds})
+
+def bench_search(data: dict, n: int, results: list):
+    index = core.SearchIndex()
+    results.append({"bench": "search_index_build", "items": n, "seconds": timed(lambda: index.build(data), repeat=1)})
+    for query in QUERIES:
+        hits = index.search(query)
+        results.append({"bench": "search", "items": n, "query": query, "hits": len(hits or {}),
+                        "seconds": timed(lambda: index.search(query))})
+
+def bench_ui(app, data: dict, n: int, folder: str, results: list):
+    from PyQt6.QtWidgets import QApplication
+    os.makedirs(folder)
+    qt = QApplication.instance() or QApplication(sys.argv[:1])
+    for view in ("sections", "tree"):
+        store = core.WriteBehindStore(core.JournalStore(os.path.join(folder, f"ui_{view}.json"),
+                                                        os.path.join(folder, f"ui_{view}.journal")))
+        settings = dict(core.DEFAULT_SETTINGS, list_view=view, watch=False)
+        windows = []
+        results.append({"bench": "ui_build", "view": view, "items": n,
+                        "seconds": timed(lambda: windows.append(app.MainWindow(data, store, settings)), repeat=1)})
+        win = windows[-1]
+        win.show()
+        qt.processEvents()
+        results.append({"bench": "ui_refresh", "view": view, "items": n, "seconds": timed(win.refresh_ui)})
+        win.index = core.SearchIndex()
+        win.index.build(data)
+        win.search_edit.blockSignals(True)  # time the filtered rebuild itself, not the debounced worker
+        win.search_edit.setText(QUERIES[0])
+        win.hits = ("", None)
+        results.append({"bench": "ui_refresh_filtered", "view": view, "items": n, "query": QUERIES[0],
+                        "seconds": timed(win.refresh_ui, repeat=1)})
+        win.close()
+        qt.processEvents()
+
+# ---------------- Main ---------------- #
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="store sizes in items, comma separated")
+    parser.add_argument("--files", type=int, default=5000, help="files in the synthetic Downloads tree")
+    parser.add_argument("--storage", default=",".join(STORAGES), help="storages to time: " + ", ".join(STORAGES))
+    parser.add_argument("--skip", default="", help="comma separated: store, scan, search, ui")
+    parser.add_argument("--out", default="benchmark_results.json")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    skip = set(args.skip.split(","))
+
+    app = load_app() if "ui" not in skip else None
+    results = []
+    workdir = tempfile.mkdtemp(prefix="fm-bench-")
+    try:
+        for n in sizes:
+            data = make_store_data(n)
+            print(f"{n} items over {len(data)} days", file=sys.stderr)
+            if "store" not in skip:
+                for storage in args.storage.split(","):
+                    bench_store(storage, data, os.path.join(workdir, f"{storage}_{n}"), results, n)
+            if "search" not in skip:
+                bench_search(data, n, results)
+            if "ui" not in skip:
+                bench_ui(app, data, n, os.path.join(workdir, f"ui_{n}"), results)
+        if "scan" not in skip:
+            bench_scan(os.path.join(workdir, "scan"), args.files, results)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"created": datetime.datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+              "platform": platform.platform(), "results": results}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    for r in results:
+        label = " ".join(f"{k}={v}" for k, v in r.items() if k not in ("bench", "seconds"))
+        print(f"{r['bench']:>20} {r['seconds'] * 1000:10.1f} ms  {label}", file=sys.stderr)
+    print(f"Results written to {args.out}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
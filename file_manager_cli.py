@@ -0,0 +1,107 @@
+"""Command line access to the File Manager data, without the GUI.
+
+    python file_manager_cli.py import report.pdf photos/*.jpg
+    python file_manager_cli.py search "meeting notes" --json
+    python file_manager_cli.py export backup.csv --format csv
+    python file_manager_cli.py scan
+    python file_manager_cli.py check --relink
+
+Uses the same settings.json and storage as the app. Don't run it while the app has the data open:
+both would be writing the same journal.
+"""
+from __future__ import annotations
+import os, sys, json, argparse
+
+def import_cmd(lib, args):
+    missing = [p for p in args.paths if not os.path.exists(p)]
+    for path in missing:
+        print(f"Skipping {path}: not found", file=sys.stderr)
+    ops, skipped = lib.import_files([p for p in args.paths if p not in missing], args.date, args.recursive)
+    print(f"Imported {len(ops)} files, skipped {len(skipped)} already listed")
+
+def search_cmd(lib, args):
+    from file_manager_core import display_title
+    groups = lib.search(args.query)
+    if args.json:
+        print(json.dumps([{"date": date, "items": items} for date, items in groups], indent=2, ensure_ascii=False))
+        return
+    for date, items in groups:
+        print(date)
+        for it in items:
+            target = it.get("path") or it.get("url") or ""
+            print(f"  {display_title(it)}" + (f"  -> {target}" if target else ""))
+
+def export_cmd(lib, args):
+    lib.export(args.out, args.format)
+    print(f"Exported {sum(map(len, lib.data.values()))} items to {args.out}")
+
+def scan_cmd(lib, args):
+    roots = [{"path": os.path.abspath(p), "recursive": args.recursive} for p in args.root] or None
+    progress = None if args.quiet else (
+        lambda percent, text: print(f"\r{percent:3d}% {text[:70]:<70}", end="", file=sys.stderr))
+    stats = lib.scan(roots, progress)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Scanned {stats['scanned']} files: {stats['new']} new, {stats['skipped']} skipped, "
+          f"{stats['errors']} unreadable in {stats['elapsed']:.1f}s")
+
+def check_cmd(lib, args):
+    on_batch = None if args.quiet else (lambda batch: print(".", end="", flush=True, file=sys.stderr))
+    stats, health = lib.check_paths(on_batch)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Checked {stats['checked']} paths (the rest were checked recently): {stats['missing']} missing, "
+          f"{stats['moved']} moved, {stats['offline']} on drives that did not answer")
+    for path, (status, _, moved_to) in sorted(health.items()):
+        if status != "ok":
+            print(f"  {status:8} {path}" + (f"  -> {moved_to}" if moved_to else ""))
+    if args.relink or args.remove_missing:
+        ops = lib.clean_paths(health, args.relink, args.remove_missing)
+        print(f"Relinked {sum(op['op'] == 'edit' for op in ops)}, removed {sum(op['op'] == 'delete' for op in ops)}")
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", help="folder holding settings.json and the data (default: next to the app)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="add files to the list, titled like the app does")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("--date", help="YYYY-MM-DD to file them under (default: today)")
+    p.add_argument("-r", "--recursive", action="store_true", help="include the subfolders of folders")
+    p.set_defaults(run=import_cmd)
+
+    p = sub.add_parser("search", help="print matching items, newest first")
+    p.add_argument("query")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(run=search_cmd)
+
+    p = sub.add_parser("export", help="write every item to a JSON or CSV file")
+    p.add_argument("out")
+    p.add_argument("--format", choices=("json", "csv"), default="json")
+    p.set_defaults(run=export_cmd)
+
+    p = sub.add_parser("scan", help="run the Downloads scan once")
+    p.add_argument("--root", action="append", default=[], help="folder to scan instead of the configured roots")
+    p.add_argument("-r", "--recursive", action="store_true", help="with --root: include subfolders")
+    p.add_argument("-q", "--quiet", action="store_true")
+    p.set_defaults(run=scan_cmd)
+
+    p = sub.add_parser("check", help="find stored files that were moved or deleted")
+    p.add_argument("--relink", action="store_true", help="point moved files at where they were found")
+    p.add_argument("--remove-missing", action="store_true", help="remove files that are gone from the list")
+    p.add_argument("-q", "--quiet", action="store_true")
+    p.set_defaults(run=check_cmd)
+
+    args = parser.parse_args(argv)
+    if args.data_dir:
+        os.environ["FILE_MANAGER_DATA"] = args.data_dir  # the core reads it on import
+    from file_manager_core import Library
+
+    lib = Library()
+    try:
+        args.run(lib, args)
+    finally:
+        lib.close()
+
+if __name__ == "__main__":
+    main()
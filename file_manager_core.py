@@ -0,0 +1,1808 @@
+"""GUI-free core of File Manager: storage, the item index, search and the Downloads scanner.
+
+File_Manager_APP.V.3.2.py, appv3.py, appv2.py and file_manager_cli.py all work through this
+module, so nothing in here may import Qt or Tkinter.
+"""
+from __future__ import annotations
+import sys, os, re, json, datetime, time, threading, fnmatch, struct, importlib, functools, bisect
+from collections import deque
+
+# ---- data location next to .py / .exe (FILE_MANAGER_DATA points scripts somewhere else) ----
+if os.environ.get("FILE_MANAGER_DATA"):
+    BASE_DIR = os.path.abspath(os.environ["FILE_MANAGER_DATA"])
+elif getattr(sys, "frozen", False):
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.path.join(BASE_DIR, "file_data.json")
+JOURNAL_FILE = os.path.join(BASE_DIR, "file_data.journal")
+COMPACT_AFTER = 500  # journal entries before they are folded back into file_data.json
+SAVE_QUIET = 1.0  # seconds without further edits before queued changes are written
+DB_FILE = os.path.join(BASE_DIR, "file_data.db")
+BIN_FILE = os.path.join(BASE_DIR, "file_data.bin")
+BIN_JOURNAL_FILE = os.path.join(BASE_DIR, "file_data.bin.journal")
+SHARD_DIR = os.path.join(BASE_DIR, "file_data.shards")
+SHARD_MANIFEST = "manifest.json"
+SETTINGS_FILE = os.path.join(BASE_DIR, "settings.json")
+SCAN_CACHE_FILE = os.path.join(BASE_DIR, "scan_cache.json")
+HASH_CACHE_FILE = os.path.join(BASE_DIR, "hash_cache.json")
+HEALTH_CACHE_FILE = os.path.join(BASE_DIR, "path_health.json")
+DEFAULT_SETTINGS = {
+    # "journal" (file_data.json + journal), "binary" (file_data.bin + journal), "sharded" or "sqlite"
+    "storage": "journal",
+    "watch": True,  # pick up new downloads while the app is open
+    # folders to import from; a plain path string or {"path", "recursive", "max_depth", "include", "exclude"}
+    "scan_roots": ["~/Downloads"],
+    "scan_workers": 4,  # folders scanned at the same time (keeps slow network shares from serialising the scan)
+    "list_view": "sections",  # "sections" (one widget per row) or "tree" (virtualized, for long histories)
+    "release_rows_over": 100,  # collapsing a day with more items than this frees its row widgets
+    "date_window": 60,  # sections rendered at a time; older ones follow as you scroll down (0 renders all)
+    "group_by": "day",  # "day", or "month" / "year" to fold long histories into fewer sections
+    "content_dedup": "off",  # "flag" or "collapse" new files whose content is already in the list under another name
+    "diagnostics": False,  # record timings of the hot paths for the Ctrl+Shift+D diagnostics window
+    "path_check": True,  # check in the background that stored files still exist, and mark the ones that don't
+}
+ROOT_DEFAULTS = {"recursive": False, "max_depth": 3, "include": [], "exclude": []}
+PARTIAL_DOWNLOAD_EXTS = (".crdownload", ".part", ".partial", ".download", ".tmp")
+PARTIAL_HASH_BYTES = 64 * 1024  # read from each end of a file before committing to a full hash
+PROGRESS_INTERVAL = 0.1  # seconds between scanner progress reports...
+PROGRESS_STEP = 1  # ... and only once the percentage has moved at least this much (100% is always reported)
+EXISTS_TIMEOUT = 2.0  # seconds to wait for a file check before calling its drive unreachable
+LAUNCH_GAP = 0.15  # seconds between launches of an "open all", so the desktop isn't flooded
+HEALTH_BATCH = 64  # paths checked per batch; results are reported and saved after each one
+HEALTH_RATE = 100  # file checks per second at most, across all drives
+HEALTH_PER_VOLUME = 2  # checks in flight per drive or network share
+HEALTH_WORKERS = 8
+HEALTH_RECHECK = 6 * 3600  # seconds a result stays fresh; a new or interrupted run skips fresh paths
+HEALTH_WALK_TIME = 30  # seconds a run may spend listing folders to find moved files, across all batches
+HEALTH_MARKERS = {"missing": "missing", "moved": "moved", "offline": "drive offline"}
+
+_optional = {}
+
+def optional_module(name: str):
+    """Imports an optional third-party module (watchdog, msgpack, psutil) on first use,
+    so startup never pays for it. None if it isn't installed."""
+    if name not in _optional:
+        try:
+            _optional[name] = importlib.import_module(name)
+        except ImportError:
+            _optional[name] = None
+    return _optional[name]
+
+def load_settings() -> dict:
+    settings = dict(DEFAULT_SETTINGS)
+    if os.path.exists(SETTINGS_FILE):
+        try:
+            with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
+                settings.update(json.load(f))
+        except:
+            pass
+    return settings
+
+# ---------------- Diagnostics ---------------- #
+
+METRICS_SAMPLES = 256  # most recent latencies kept per metric
+METRICS_BUCKETS = (1, 5, 20, 100, 500)  # histogram upper bounds in ms; the last bucket is everything slower
+
+class Metrics:
+    """Opt-in counters and latency histograms. Off by default, then every hook is a single attribute check.
+    Latencies live in a ring buffer per metric, so memory stays flat however long the app runs."""
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()  # the scanner and the search pool record too
+        self.counters = {}
+        self.samples = {}
+
+    def count(self, name: str, n: int = 1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, name: str, seconds: float):
+        if not self.enabled:
+            return
+        with self.lock:
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=METRICS_SAMPLES)
+            self.samples[name].append(seconds * 1000)
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def timed(self, name: str):
+        """Decorator recording how long each call takes."""
+        def wrap(fn):
+            @functools.wraps(fn)
+            def inner(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return inner
+        return wrap
+
+    def reset(self):
+        with self.lock:
+            self.counters, self.samples = {}, {}
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            counters = dict(self.counters)
+            samples = {name: sorted(values) for name, values in self.samples.items()}
+        latencies = {}
+        for name, values in samples.items():
+            bounds = [f"<{b}ms" for b in METRICS_BUCKETS] + [f">={METRICS_BUCKETS[-1]}ms"]
+            buckets = dict.fromkeys(bounds, 0)
+            for v in values:
+                buckets[next((f"<{b}ms" for b in METRICS_BUCKETS if v < b), bounds[-1])] += 1
+            latencies[name] = {"calls": counters.get(name, 0), "recent": len(values),
+                               "p50_ms": round(values[len(values) // 2], 2),
+                               "p95_ms": round(values[int(len(values) * 0.95)], 2),
+                               "max_ms": round(values[-1], 2), "histogram": buckets}
+        return {"counters": {k: v for k, v in counters.items() if k not in samples}, "latencies": latencies,
+                "rss_bytes": process_rss()}
+
+METRICS = Metrics()
+
+def process_rss() -> int | None:
+    """Resident memory of this process: psutil if installed, else the OS directly."""
+    psutil = optional_module("psutil")
+    if psutil:
+        return psutil.Process().memory_info().rss
+    try:
+        if os.name == "nt":
+            import ctypes
+            from ctypes import wintypes
+
+            class Counters(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + \
+                           [(n, ctypes.c_size_t) for n in (
+                               "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                               "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage",
+                               "PagefileUsage", "PeakPagefileUsage")]
+
+            c = Counters()
+            c.cb = ctypes.sizeof(c)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            ok = ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(c), c.cb)
+            return c.WorkingSetSize if ok else None
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, AttributeError, ValueError):
+        return None
+
+# ---------------- Storage ---------------- #
+
+def new_item_id() -> str:
+    import uuid  # pulls in platform; only needed once something is added
+    return uuid.uuid4().hex[:12]
+
+def ensure_item_ids(data: dict) -> bool:
+    """Gives every item a unique, stable id: older file_data.json files have none,
+    and hand-edited ones may contain copies."""
+    changed, seen = False, set()
+    for items in data.values():
+        for item in items:
+            if item.get("id") in seen or "id" not in item:
+                item["id"] = new_item_id()
+                changed = True
+            seen.add(item["id"])
+    return changed
+
+def upgrade_items(data: dict) -> bool:
+    """ensure_item_ids plus the appv2 note format: its notes kept the title in "desc",
+    every other app reads it from "title". A note that has both keeps a "desc" that says
+    something else. Returns True if anything changed."""
+    changed = ensure_item_ids(data)
+    for items in data.values():
+        for item in items:
+            if "note" not in item or "desc" not in item:
+                continue
+            if item.setdefault("title", item["desc"]) != item["desc"]:
+                continue
+            del item["desc"]
+            changed = True
+    return changed
+
+def write_atomic(path: str, text: str | bytes):
+    """Writes to a temp file first so a crash can never leave `path` half written."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") if isinstance(text, bytes) else open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def apply_op(data: dict, op: dict):
+    """Replays one journal entry. Entries are keyed by date + item id, so replaying twice is harmless."""
+    date, items = op.get("date"), data.get(op.get("date"), [])
+    item_id = op["item"]["id"] if op.get("op") == "add" else op.get("id")
+    pos = next((i for i, it in enumerate(items) if it.get("id") == item_id), None)
+    if op.get("op") == "add":
+        if pos is None:
+            items.append(dict(op["item"]))
+        else:
+            items[pos] = dict(op["item"])
+        data[date] = items
+    elif op.get("op") == "edit" and pos is not None:
+        items[pos].update(op.get("fields", {}))
+    elif op.get("op") == "delete" and pos is not None:
+        del items[pos]
+        if not items:
+            del data[date]
+
+# file_data.bin: magic, version, codec, index length, index [[date, chunk length], ...], then one chunk per date.
+# Dates are stored newest first so the recent ones can be decoded and shown before the rest of the file is read.
+BIN_MAGIC = b"FMDB"
+BIN_VERSION = 1
+BIN_HEADER = struct.Struct("<4sBBI")
+CODEC_JSON, CODEC_MSGPACK = 0, 1
+
+class UnsupportedFormat(Exception):
+    pass
+
+def encode_chunk(codec: int, obj) -> bytes:
+    if codec == CODEC_MSGPACK:
+        return optional_module("msgpack").packb(obj, use_bin_type=True)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def decode_chunk(codec: int, raw: bytes):
+    if codec == CODEC_MSGPACK:
+        return optional_module("msgpack").unpackb(raw, raw=False)
+    return json.loads(raw)
+
+def write_binary(path: str, data: dict):
+    codec = CODEC_MSGPACK if optional_module("msgpack") else CODEC_JSON
+    dates = sorted(data, reverse=True)
+    chunks = [encode_chunk(codec, data[d]) for d in dates]
+    index = encode_chunk(codec, [[d, len(c)] for d, c in zip(dates, chunks)])
+    write_atomic(path, BIN_HEADER.pack(BIN_MAGIC, BIN_VERSION, codec, len(index)) + index + b"".join(chunks))
+
+def read_binary(path: str):
+    """Yields (date, items) newest first, decoding one date at a time."""
+    with open(path, "rb") as f:
+        head = f.read(BIN_HEADER.size)
+        if len(head) < BIN_HEADER.size:
+            raise ValueError("truncated header")
+        magic, version, codec, index_len = BIN_HEADER.unpack(head)
+        if magic != BIN_MAGIC:
+            raise ValueError("not a file_data.bin")
+        if version > BIN_VERSION or codec not in (CODEC_JSON, CODEC_MSGPACK):
+            raise UnsupportedFormat(f"{path} was written by a newer version")
+        if codec == CODEC_MSGPACK and optional_module("msgpack") is None:
+            raise UnsupportedFormat(f"{path} needs the msgpack package (pip install msgpack)")
+        for date, length in decode_chunk(codec, f.read(index_len)):
+            raw = f.read(length)
+            if len(raw) < length:
+                raise ValueError("truncated chunk")
+            yield date, decode_chunk(codec, raw)
+
+class JournalStore:
+    """file_data.json snapshot + append-only journal of add/edit/delete entries.
+
+    Every mutation appends a line to the journal instead of rewriting the whole
+    store. Once the journal grows past COMPACT_AFTER entries it is folded into
+    the snapshot on a background thread; startup replays snapshot + journal.
+    With binary=True the snapshot is a file_data.bin instead of indented JSON.
+    """
+    def __init__(self, snapshot_path: str = DATA_FILE, journal_path: str = JOURNAL_FILE, binary: bool = False):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.binary = binary
+        self.compacting_path = journal_path + ".compacting"
+        self.lock = threading.Lock()
+        self.entries = 0
+        self.compactor = None
+
+    def modified(self) -> float:
+        """Newest mtime of the snapshot and its journals, 0 if there is nothing on disk."""
+        paths = (self.snapshot_path, self.journal_path, self.compacting_path)
+        return max((os.path.getmtime(p) for p in paths if os.path.exists(p)), default=0)
+
+    def _read_snapshot(self):
+        if self.binary:
+            yield from read_binary(self.snapshot_path)
+        else:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                yield from json.load(f).items()
+
+    def load(self) -> dict:
+        data = {}
+        if os.path.exists(self.snapshot_path):
+            try:
+                for date, items in self._read_snapshot():
+                    data[date] = items
+            except UnsupportedFormat:
+                raise
+            except:
+                # keep the unreadable file around instead of silently overwriting it later
+                os.replace(self.snapshot_path, self.snapshot_path + ".corrupt")
+                data = {}
+        pending = os.path.exists(self.compacting_path)
+        self.entries = sum(self._replay(p, data) for p in (self.compacting_path, self.journal_path))
+        if upgrade_items(data) or pending:
+            # one-off migration or an interrupted compaction: settle everything into the snapshot now
+            self.replace_all(data)
+        return data
+
+    def load_all(self) -> dict:
+        return self.load()
+
+    def replace_all(self, data: dict):
+        """Makes `data` the whole store: a fresh snapshot and no journal."""
+        self._write_snapshot(data)
+        for p in (self.compacting_path, self.journal_path):
+            if os.path.exists(p):
+                os.remove(p)
+        self.entries = 0
+
+    def iter_load(self):
+        """Like load(), but yields (date, items) newest first while a binary snapshot is still being
+        decoded, so the recent days can be shown early. The journal is applied to each date as it passes."""
+        if not self.binary or not os.path.exists(self.snapshot_path) or os.path.exists(self.compacting_path):
+            yield from sorted(self.load().items(), reverse=True)  # nothing to stream, or repairs come first
+            return
+        journal = {}
+        for op in self._read_ops(self.journal_path):
+            journal.setdefault(op.get("date"), []).append(op)
+        self.entries = sum(map(len, journal.values()))
+        extra = sorted(journal, reverse=True)  # journal dates, some of which may not be in the snapshot
+
+        def settle(date, items):
+            chunk = {date: items} if items else {}
+            for op in journal.pop(date, []):
+                apply_op(chunk, op)
+            return chunk.get(date)
+
+        try:
+            for date, items in read_binary(self.snapshot_path):
+                while extra and extra[0] > date:
+                    d = extra.pop(0)
+                    if d in journal and (items_d := settle(d, [])):
+                        yield d, items_d
+                items = settle(date, items)
+                if items:
+                    yield date, items
+        except UnsupportedFormat:
+            raise
+        except (ValueError, TypeError, KeyError, OSError):
+            os.replace(self.snapshot_path, self.snapshot_path + ".corrupt")
+        for d in extra:
+            if d in journal and (items_d := settle(d, [])):
+                yield d, items_d
+
+    def _read_ops(self, path: str) -> list[dict]:
+        if not os.path.exists(path):
+            return []
+        ops, good_end = [], 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn write from a crash, drop it
+                try:
+                    ops.append(json.loads(line))
+                except ValueError:
+                    pass
+                good_end += len(line)
+        if good_end != os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(good_end)
+        return ops
+
+    def _replay(self, path: str, data: dict) -> int:
+        count = 0
+        for op in self._read_ops(path):
+            try:
+                apply_op(data, op)
+                count += 1
+            except (KeyError, TypeError):
+                pass
+        return count
+
+    def _write_snapshot(self, data: dict):
+        if self.binary:
+            write_binary(self.snapshot_path, data)
+        else:
+            write_atomic(self.snapshot_path, json.dumps(data, indent=2, ensure_ascii=False))
+
+    def append(self, ops: list[dict]):
+        if not ops:
+            return
+        text = "".join(json.dumps(op, ensure_ascii=False) + "\n" for op in ops)
+        with self.lock:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries += len(ops)
+
+    def maybe_compact(self, data: dict):
+        if self.entries >= COMPACT_AFTER:
+            self.compact(data)
+
+    def compact(self, data: dict, block: bool = False):
+        """Folds the journal into the snapshot. The snapshot is written off the GUI thread."""
+        with self.lock:
+            if self.compactor and self.compactor.is_alive():
+                if block:
+                    self.compactor.join()
+                return
+            if os.path.exists(self.journal_path):
+                if os.path.exists(self.compacting_path):
+                    # an earlier compaction failed: keep its entries and add ours behind them
+                    with open(self.journal_path, "rb") as src, open(self.compacting_path, "ab") as dst:
+                        dst.write(src.read())
+                    os.remove(self.journal_path)
+                else:
+                    os.replace(self.journal_path, self.compacting_path)
+            self.entries = 0
+        snapshot = {d: [dict(it) for it in items] for d, items in data.items()}
+
+        def run():
+            try:
+                self._write_snapshot(snapshot)
+                if os.path.exists(self.compacting_path):
+                    os.remove(self.compacting_path)
+            except OSError:
+                pass  # the journal is still on disk and gets replayed on the next start
+
+        self.compactor = threading.Thread(target=run, daemon=True)
+        self.compactor.start()
+        if block:
+            self.compactor.join()
+
+    def close(self, data: dict):
+        if self.entries or os.path.exists(self.compacting_path):
+            self.compact(data, block=True)
+        elif self.compactor:
+            self.compactor.join()
+
+ITEM_KINDS = (("path", "file"), ("note", "note"), ("url", "link"))
+ITEM_COLUMNS = ("id", "path", "url", "note")  # keys with their own column besides the title
+
+def item_kind(item: dict) -> str:
+    return next((kind for key, kind in ITEM_KINDS if key in item), "file")
+
+def item_to_row(date: str, pos: int, item: dict) -> tuple:
+    # notes are titled by "title" (appv2 ones by "desc"), everything else by "desc";
+    # the other one, if any, goes to extra
+    title_key = "title" if "note" in item and "title" in item else "desc"
+    extra = {k: v for k, v in item.items() if k != title_key and k not in ITEM_COLUMNS}
+    title = item.get(title_key)
+    return (item["id"], date, item_kind(item), title, item.get("path"), item.get("url"),
+            item.get("note"), pos, json.dumps(extra, ensure_ascii=False) if extra else None)
+
+def row_to_item(row: tuple) -> dict:
+    item_id, kind, title, path, url, note, extra = row
+    item = {"id": item_id, "title" if kind == "note" else "desc": title or ""}
+    if kind == "file":
+        item["path"] = path
+    elif kind == "note":
+        item["note"] = note or ""
+    else:
+        item["url"] = url
+    if extra:
+        item.update(json.loads(extra))
+    return item
+
+class SqliteStore:
+    """Optional file_data.db backend (settings.json: "storage": "sqlite").
+
+    Items live in one table with real columns and indexes on date and path, so
+    dedup checks and per-day lookups are indexed queries. Like ShardedStore, load()
+    only returns the current and newest months and the rest comes in through
+    load_month(). open_store() copies the data over from the other formats.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS items (
+            id TEXT PRIMARY KEY, date TEXT NOT NULL, kind TEXT NOT NULL,
+            title TEXT, path TEXT, url TEXT, note TEXT,
+            pos INTEGER NOT NULL, extra TEXT
+        );
+        CREATE INDEX IF NOT EXISTS items_date ON items(date, pos);
+        CREATE INDEX IF NOT EXISTS items_path ON items(path);
+    """
+    FIELDS = "id, kind, title, path, url, note, extra"
+
+    def __init__(self, db_path: str = DB_FILE):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.cutoff = ""  # months before this one are left out of load()
+        self.loaded = set()
+        import sqlite3
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(self.SCHEMA)
+
+    def _select(self, where: str, args: tuple) -> dict:
+        data = {}
+        with self.lock:
+            rows = self.db.execute(f"SELECT date, {self.FIELDS} FROM items WHERE {where} ORDER BY date, pos",
+                                   args).fetchall()
+        for row in rows:
+            data.setdefault(row[0], []).append(row_to_item(row[1:]))
+        return data
+
+    def load(self) -> dict:
+        with self.lock:
+            newest = self.db.execute("SELECT MAX(date) FROM items").fetchone()[0] or ""
+        self.cutoff, self.loaded = min(str(datetime.date.today())[:7], newest[:7]), set()
+        return self._select("date >= ?", (self.cutoff,))
+
+    def unloaded(self) -> dict[str, int]:
+        """{date: item count} for every month still only in the database."""
+        with self.lock:
+            rows = self.db.execute("SELECT date, COUNT(*) FROM items WHERE date < ? GROUP BY date",
+                                   (self.cutoff,)).fetchall()
+        return {d: n for d, n in rows if d[:7] not in self.loaded}
+
+    def load_month(self, month: str) -> dict:
+        self.loaded.add(month)
+        return self._select("date >= ? AND date < ?", (month, month + "~"))
+
+    def load_all(self) -> dict:
+        self.cutoff, self.loaded = "", set()
+        return self._select("1", ())
+
+    def modified(self) -> float:
+        return sqlite_modified(self.db_path)
+
+    def replace_all(self, data: dict):
+        rows = [item_to_row(date, pos, item) for date, items in data.items() for pos, item in enumerate(items)]
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM items")
+            self.db.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def path_id(self, path: str) -> str | None:
+        with self.lock:
+            row = self.db.execute("SELECT id FROM items WHERE path = ? LIMIT 1", (path,)).fetchone()
+        return row[0] if row else None
+
+    def append(self, ops: list[dict]):
+        """Applies a batch of journal-style ops in a single transaction."""
+        if not ops:
+            return
+        with self.lock, self.db:
+            for op in ops:
+                if op.get("op") == "add":
+                    pos = self.db.execute("SELECT COALESCE(MAX(pos), -1) + 1 FROM items WHERE date = ?",
+                                          (op["date"],)).fetchone()[0]
+                    self.db.execute("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                    item_to_row(op["date"], pos, op["item"]))
+                elif op.get("op") == "edit":
+                    row = self.db.execute(f"SELECT date, pos, {self.FIELDS} FROM items WHERE id = ?",
+                                          (op["id"],)).fetchone()
+                    if row is None:
+                        continue
+                    item = row_to_item(row[2:])
+                    item.update(op.get("fields", {}))
+                    self.db.execute("REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                    item_to_row(row[0], row[1], item))
+                elif op.get("op") == "delete":
+                    self.db.execute("DELETE FROM items WHERE id = ?", (op["id"],))
+
+    def maybe_compact(self, data: dict):
+        pass  # WAL checkpoints happen inside sqlite
+
+    def close(self, data: dict):
+        with self.lock:
+            self.db.close()
+
+def sqlite_modified(db_path: str = DB_FILE) -> float:
+    """Last write to file_data.db, counting what still sits in its WAL; 0 if there is none.
+    Checked without connecting: opening the database creates a fresh -wal file."""
+    paths = (db_path, db_path + "-wal")
+    return max((os.path.getmtime(p) for p in paths if os.path.exists(p) and os.path.getsize(p)), default=0)
+
+class ShardedStore:
+    """One compact JSON file per month plus a manifest of {month: {date: item count}}.
+
+    load() reads the manifest and only the current and newest shards; older
+    months come in through load_month() when their section is opened or a
+    search needs them. append() rewrites just the shards its ops touch.
+    """
+    def __init__(self, folder: str = SHARD_DIR):
+        self.folder = folder
+        self.lock = threading.Lock()
+        self.manifest = {}
+        self.loaded = set()
+        self.paths = None  # path -> id over every shard, built on the first path_id()
+
+    def _shard_path(self, month: str) -> str:
+        return os.path.join(self.folder, month + ".json")
+
+    def _read(self, month: str) -> dict:
+        try:
+            with open(self._shard_path(month), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, month: str, chunk: dict):
+        if chunk:
+            write_atomic(self._shard_path(month), json.dumps(chunk, ensure_ascii=False, separators=(",", ":")))
+            self.manifest[month] = {d: len(items) for d, items in chunk.items()}
+        else:
+            if os.path.exists(self._shard_path(month)):
+                os.remove(self._shard_path(month))
+            self.manifest.pop(month, None)
+
+    def _write_manifest(self):
+        write_atomic(os.path.join(self.folder, SHARD_MANIFEST), json.dumps({"version": 1, "months": self.manifest}))
+
+    def replace_all(self, data: dict):
+        """Splits `data` into month shards, replacing whatever the folder held."""
+        with self.lock:
+            self._replace_all(data)
+
+    def _replace_all(self, data: dict):
+        os.makedirs(self.folder, exist_ok=True)
+        for name in os.listdir(self.folder):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.folder, name))
+        self.manifest, self.loaded, self.paths = {}, set(), None
+        months = {}
+        for date, items in data.items():
+            months.setdefault(date[:7], {})[date] = items
+        for month, chunk in months.items():
+            self._write(month, chunk)
+        self._write_manifest()
+
+    def load(self) -> dict:
+        with self.lock:
+            if not os.path.isdir(self.folder):
+                self._replace_all({})
+            try:
+                with open(os.path.join(self.folder, SHARD_MANIFEST), "r", encoding="utf-8") as f:
+                    cached = json.load(f)["months"]
+            except:
+                cached = {}
+            # the shard files are the truth, the manifest only caches their date counts
+            months = sorted(n[:-5] for n in os.listdir(self.folder) if n.endswith(".json") and n != SHARD_MANIFEST)
+            recent = {str(datetime.date.today())[:7]} | set(months[-1:])
+            self.manifest = {m: cached[m] for m in months if m in cached}
+            data, stale = {}, False
+            for month in months:
+                if month not in recent and month in self.manifest:
+                    continue
+                chunk = self._read(month)
+                if upgrade_items(chunk) or self.manifest.get(month) != {d: len(i) for d, i in chunk.items()}:
+                    self._write(month, chunk)
+                    stale = True
+                if month in recent:
+                    data.update(chunk)
+                    self.loaded.add(month)
+            if stale:
+                self._write_manifest()
+            return data
+
+    def modified(self) -> float:
+        path = os.path.join(self.folder, SHARD_MANIFEST)
+        return os.path.getmtime(path) if os.path.exists(path) else 0
+
+    def load_all(self) -> dict:
+        data = self.load()
+        for month in list(self.manifest):
+            if month not in self.loaded:
+                data.update(self.load_month(month))
+        return data
+
+    def unloaded(self) -> dict[str, int]:
+        """{date: item count} for every month still only on disk."""
+        with self.lock:
+            return {d: n for m, dates in self.manifest.items() if m not in self.loaded for d, n in dates.items()}
+
+    def load_month(self, month: str) -> dict:
+        with self.lock:
+            self.loaded.add(month)
+            chunk = self._read(month)
+            if upgrade_items(chunk):
+                self._write(month, chunk)
+            return chunk
+
+    def path_id(self, path: str) -> str | None:
+        with self.lock:
+            if self.paths is None:
+                self.paths = {item["path"]: item.get("id") for m in self.manifest
+                              for items in self._read(m).values() for item in items if "path" in item}
+            return self.paths.get(path)
+
+    def append(self, ops: list[dict]):
+        """Re-reads, patches and rewrites each touched month, then the manifest."""
+        if not ops:
+            return
+        by_month = {}
+        for op in ops:
+            by_month.setdefault(op["date"][:7], []).append(op)
+        with self.lock:
+            for month, month_ops in by_month.items():
+                chunk = self._read(month)
+                for op in month_ops:
+                    apply_op(chunk, op)
+                self._write(month, chunk)
+            self._write_manifest()
+            self.paths = None
+
+    def maybe_compact(self, data: dict):
+        pass  # every append already rewrites its shards
+
+    def close(self, data: dict):
+        pass
+
+def open_store(settings: dict) -> JournalStore | SqliteStore | ShardedStore:
+    stores = {"journal": JournalStore(), "binary": JournalStore(BIN_FILE, BIN_JOURNAL_FILE, binary=True),
+              "sharded": ShardedStore()}
+    stamps = {name: store.modified() for name, store in stores.items()}
+    stamps["sqlite"] = sqlite_modified()
+    kind = settings.get("storage") if settings.get("storage") in stamps else "journal"
+    newest = max(stamps, key=stamps.get)
+    if "sqlite" in (kind, newest):
+        stores["sqlite"] = SqliteStore()
+    if stamps[newest] > stamps[kind]:
+        # the format was switched since the last run: carry the newer copy over, the old files stay as a backup
+        stores[kind].replace_all(stores[newest].load_all())
+    if kind != "sqlite" and "sqlite" in stores:
+        stores["sqlite"].close({})
+    return stores[kind]
+
+class WriteBehindStore:
+    """Wraps a store so the GUI thread never waits on disk.
+
+    append() only queues the ops and marks the store dirty; a background thread
+    writes everything queued as one journal append / transaction once no new
+    edits have arrived for `quiet` seconds. close() flushes what is left.
+    Reads (load, path_id, ...) go straight to the wrapped store.
+    """
+    def __init__(self, store: JournalStore | SqliteStore | ShardedStore, quiet: float = SAVE_QUIET):
+        self.store = store
+        self.quiet = quiet
+        self.cond = threading.Condition()
+        self.pending = []
+        self.callbacks = []
+        self.dirty = False
+        self.last_change = 0.0
+        self.closing = False
+        self.error = None  # last failed write, surfaced by the GUI on the next save
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def append(self, ops: list[dict], after=None):
+        """`after` runs on the writer thread once these ops are on disk."""
+        if not ops and not after:
+            return
+        with self.cond:
+            self.pending.extend(ops)
+            if after:
+                self.callbacks.append(after)
+            self.dirty = True
+            self.last_change = time.monotonic()
+            self.cond.notify()
+
+    def maybe_compact(self, data: dict):
+        self.store.maybe_compact(data)  # the snapshot copy has to be taken on the thread that owns `data`
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.dirty and not self.closing:
+                    self.cond.wait()
+                while not self.closing:
+                    left = self.last_change + self.quiet - time.monotonic()
+                    if left <= 0:
+                        break
+                    self.cond.wait(left)  # a new edit pushes last_change forward
+                if self.closing:
+                    return
+            self.flush()
+
+    def flush(self):
+        with self.cond:
+            ops, callbacks = self.pending, self.callbacks
+            self.pending, self.callbacks, self.dirty = [], [], False
+        try:
+            self.store.append(ops)
+        except Exception as e:
+            with self.cond:  # keep them for the next attempt
+                self.pending[:0] = ops
+                self.callbacks[:0] = callbacks
+                self.dirty = True
+                self.last_change = time.monotonic()
+            self.error = e
+            return
+        for callback in callbacks:
+            callback()
+
+    def close(self, data: dict):
+        with self.cond:
+            self.closing = True
+            self.cond.notify()
+        self.thread.join()
+        self.flush()
+        if self.error and self.pending:
+            raise self.error
+        self.store.close(data)
+
+class DateOrder:
+    """Date keys kept sorted as days come and go, so listing them newest first never re-sorts.
+    Month ("2024-05") and year keys work as bounds too: they sort just before their own days."""
+    def __init__(self, dates=()):
+        self.keys = sorted(set(dates))  # oldest first, for bisect
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, date: str) -> bool:
+        i = bisect.bisect_left(self.keys, date)
+        return i < len(self.keys) and self.keys[i] == date
+
+    def add(self, date: str):
+        i = bisect.bisect_left(self.keys, date)
+        if i == len(self.keys) or self.keys[i] != date:
+            self.keys.insert(i, date)
+
+    def discard(self, date: str):
+        i = bisect.bisect_left(self.keys, date)
+        if i < len(self.keys) and self.keys[i] == date:
+            del self.keys[i]
+
+    def newest(self, before: str | None = None):
+        """Days newest first; with `before` (a day, month or year key) only the ones older than it."""
+        i = len(self.keys) if before is None else bisect.bisect_left(self.keys, before)
+        for j in range(i - 1, -1, -1):
+            yield self.keys[j]
+
+    def within(self, key: str) -> list[str]:
+        """Days of a day, month or year key, newest first."""
+        # "~" sorts after digits and "-"
+        lo, hi = bisect.bisect_left(self.keys, key), bisect.bisect_left(self.keys, key + "~")
+        return self.keys[lo:hi][::-1]
+
+class ItemIndex:
+    """id -> (date, item) and path -> ids over the live data dict, plus the ordered dates. Every
+    MainWindow mutation goes through here and gets back the op to journal."""
+    def __init__(self, data: dict):
+        self.data = data
+        self.by_id = {}
+        self.by_path = {}
+        self.dates = DateOrder(data)
+        for date, items in data.items():
+            for item in items:
+                self._link(date, item)
+
+    def _link(self, date: str, item: dict):
+        self.by_id[item["id"]] = (date, item)
+        if "path" in item:
+            self.by_path.setdefault(item["path"], set()).add(item["id"])
+
+    def _unlink_path(self, item: dict):
+        ids = self.by_path.get(item.get("path"))
+        if ids is None:
+            return
+        ids.discard(item["id"])
+        if not ids:
+            del self.by_path[item["path"]]
+
+    def merge_day(self, date: str, items: list[dict]):
+        """Adopts a day loaded later (an older shard). Items already in memory for that day, e.g. imported
+        while the month was still only on disk and not saved yet, are kept."""
+        ids = {it.get("id") for it in items}
+        extra = [it for it in self.data.get(date, []) if it.get("id") not in ids]
+        for item in items:
+            self._link(date, item)
+        self.data[date] = items + extra
+        self.dates.add(date)
+
+    def get(self, item_id: str) -> tuple[str, dict] | None:
+        return self.by_id.get(item_id)
+
+    def find_path(self, path: str) -> list[tuple[str, dict]]:
+        return [self.by_id[i] for i in self.by_path.get(path, ())]
+
+    def add(self, date: str, item: dict) -> dict:
+        if date not in self.data:
+            self.dates.add(date)
+        self.data.setdefault(date, []).append(item)
+        self._link(date, item)
+        return {"op": "add", "date": date, "item": item}
+
+    def edit(self, item_id: str, fields: dict) -> dict:
+        date, item = self.by_id[item_id]
+        if "path" in fields:
+            self._unlink_path(item)
+        item.update(fields)
+        if "path" in fields:
+            self._link(date, item)
+        return {"op": "edit", "date": date, "id": item_id, "fields": fields}
+
+    def delete(self, item_id: str) -> dict:
+        """Removes by identity, so two identical-looking entries can never be confused."""
+        date, item = self.by_id.pop(item_id)
+        self._unlink_path(item)
+        items = self.data[date]
+        for i in range(len(items) - 1, -1, -1):
+            if items[i] is item:
+                del items[i]
+                break
+        if not items:
+            del self.data[date]
+            self.dates.discard(date)
+        return {"op": "delete", "date": date, "id": item_id}
+
+# ---------------- Search ---------------- #
+
+TOKEN_RE = re.compile(r"\w+")
+
+def searchable_text(item: dict) -> str:
+    """What the search box looks at: title/desc, file name, url and note body."""
+    return " ".join((item.get("desc", ""), item.get("title", ""), os.path.basename(item.get("path", "")),
+                     item.get("url", ""), item.get("note", "")))
+
+class SearchIndex:
+    """Inverted index for the search box, kept up to date from the same ops that go to the store.
+
+    Items are split into word tokens (token -> item ids). Every distinct token is also
+    indexed by its trigrams (trigram -> tokens), so a query term is matched as a
+    substring of a token by intersecting trigram postings and checking the few candidate
+    tokens; terms under three characters scan the vocabulary instead. Query cost depends
+    on the vocabulary, never on how long note bodies are. Several terms are ANDed.
+    """
+    FILTER_COST = 8  # checking one hit's tokens for a term costs about this many postings merged
+    COMMON_TOKENS = 256  # a term in more distinct tokens than this keeps its merged postings in `common`
+    COMMON_KEEP = 32
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.postings = {}  # token -> {item id}
+        self.grams = {}  # trigram -> {token}
+        self.item_tokens = {}  # item id -> {token}
+        self.items = {}  # item id -> item (edits re-index from the live dict)
+        self.dates = {}  # item id -> date
+        self.ready = threading.Event()
+        self.pending = []  # ops that arrive while build() is still running
+        self.common = {}  # short/common term -> [tokens containing it, {item id}, {item id: date} or None]
+
+    @METRICS.timed("search.index_build")
+    def build(self, data: dict):
+        """Indexes a {date: [items]} snapshot; may run on a worker while the GUI keeps applying ops."""
+        for date, items in data.items():
+            for item in items:
+                self._add(date, item)
+        with self.lock:
+            for op in self.pending:
+                self._apply(op)
+            self.pending = []
+            self.ready.set()
+
+    def apply(self, op: dict):
+        with self.lock:
+            if not self.ready.is_set():
+                return self.pending.append(op)
+            self._apply(op)
+
+    def _apply(self, op: dict):
+        if op["op"] == "add":
+            self._remove(op["item"]["id"])
+            self._add(op["date"], op["item"])
+        elif op["op"] == "edit" and op["id"] in self.items:
+            item = self.items[op["id"]]
+            self._remove(op["id"])
+            self._add(op["date"], item)
+        elif op["op"] == "delete":
+            self._remove(op["id"])
+
+    def _add(self, date: str, item: dict):
+        item_id = item["id"]
+        tokens = set(TOKEN_RE.findall(searchable_text(item).lower()))
+        self.items[item_id], self.dates[item_id], self.item_tokens[item_id] = item, date, tokens
+        postings = self.postings
+        for tok in [t for t in tokens if t not in postings]:  # first time this word is seen
+            postings[tok] = set()
+            for g in self._grams(tok):
+                self.grams.setdefault(g, set()).add(tok)
+        for tok in tokens:
+            postings[tok].add(item_id)
+        for term, (_, ids, dated) in self.common.items():
+            if not any(term in tok for tok in tokens):
+                continue
+            ids.add(item_id)
+            if dated is not None:
+                dated[item_id] = date
+
+    def _remove(self, item_id: str):
+        self.items.pop(item_id, None)
+        self.dates.pop(item_id, None)
+        for _, ids, dated in self.common.values():
+            ids.discard(item_id)
+            if dated is not None:
+                dated.pop(item_id, None)
+        for tok in self.item_tokens.pop(item_id, ()):
+            ids = self.postings[tok]
+            ids.discard(item_id)
+            if ids:
+                continue
+            del self.postings[tok]
+            for g in self._grams(tok):
+                self.grams[g].discard(tok)
+                if not self.grams[g]:
+                    del self.grams[g]
+
+    @staticmethod
+    def _grams(tok: str) -> set:
+        return {tok[i:i + 3] for i in range(len(tok) - 2)}
+
+    def _tokens_containing(self, term: str):
+        """A term under three characters has no trigram, so it is matched by a pass over the
+        distinct tokens; `common` keeps the merged result for the next keystroke."""
+        if len(term) < 3:
+            return [tok for tok in self.postings if term in tok]
+        if len(term) == 3:
+            return self.grams.get(term, ())
+        sets = sorted((self.grams.get(term[i:i + 3], set()) for i in range(len(term) - 2)), key=len)
+        return [tok for tok in sets[0].intersection(*sets[1:]) if term in tok]
+
+    def _plan(self, term: str) -> tuple:
+        """(how many distinct tokens contain `term`, those tokens or None if not looked up yet).
+        A short term counts as matching the whole vocabulary, so it goes last and is usually
+        checked against the few hits left instead of scanning for its tokens."""
+        if term in self.common:
+            return self.common[term][0], None
+        if len(term) < 3:
+            return len(self.postings), None
+        tokens = self._tokens_containing(term)
+        return len(tokens), tokens
+
+    def _merged(self, term: str, tokens) -> set:
+        """Every item with a token containing `term`. Broad terms ("a", "re", "pdf") would merge thousands
+        of postings on every keystroke; their result is kept in `common` instead."""
+        if term in self.common:
+            return self.common[term][1]
+        if tokens is None:
+            tokens = self._tokens_containing(term)
+        ids = set().union(*(self.postings[tok] for tok in tokens))
+        if len(term) < 3 or len(tokens) > self.COMMON_TOKENS:
+            if len(self.common) >= self.COMMON_KEEP:
+                del self.common[next(iter(self.common))]
+            self.common[term] = [len(tokens), ids, None]
+        return ids
+
+    def _dated(self, hits: set) -> dict[str, str]:
+        return dict(zip(hits, map(self.dates.__getitem__, hits)))
+
+    @METRICS.timed("search.query")
+    def search(self, query: str) -> dict[str, str] | None:
+        """Item id -> date for items matching every term, or None if the query has no word characters.
+        Terms go narrowest first; once few hits are left, a broad term is checked against
+        those items' tokens instead of merging its postings."""
+        terms = set(TOKEN_RE.findall(query.lower()))
+        if not terms or not self.ready.is_set():
+            return None
+        with self.lock:
+            plans = sorted((self._plan(term) + (term,) for term in terms), key=lambda plan: plan[0])
+            hits = None
+            for width, tokens, term in plans:
+                if hits is None:
+                    hits = self._merged(term, tokens)
+                elif term not in self.common and len(hits) * self.FILTER_COST < width:
+                    hits = {i for i in hits if any(term in tok for tok in self.item_tokens[i])}
+                else:
+                    hits = hits & self._merged(term, tokens)
+                if not hits:
+                    return {}
+            if len(plans) > 1 or term not in self.common:
+                return self._dated(hits)
+            # A broad term on its own: looking up thousands of dates costs more than the merge, so keep them
+            entry = self.common[term]
+            if entry[2] is None:
+                entry[2] = self._dated(hits)
+            return dict(entry[2])
+
+# ---------------- Auto-Add ---------------- #
+
+def normalize_path(path: str) -> str:
+    """The one spelling of a stored path (absolute, platform separators, no ".."), so files added
+    through a dialog, the scanner or the folder watcher are recognised as the same file."""
+    return os.path.abspath(path)
+
+def scan_roots(settings: dict) -> list[dict]:
+    """Normalises settings["scan_roots"] into dicts with every ROOT_DEFAULTS key and an absolute path."""
+    roots = []
+    for entry in settings.get("scan_roots") or []:
+        root = dict(ROOT_DEFAULTS, **({"path": entry} if isinstance(entry, str) else entry))
+        root["path"] = normalize_path(os.path.expanduser(root["path"]))
+        roots.append(root)
+    return roots
+
+def matches_rules(root: dict, name: str, is_dir: bool = False) -> bool:
+    """Exclude globs apply to files and folders, include globs only to files."""
+    if any(fnmatch.fnmatch(name, pat) for pat in root["exclude"]):
+        return False
+    return is_dir or not root["include"] or any(fnmatch.fnmatch(name, pat) for pat in root["include"])
+
+def root_accepts(root: dict, path: str) -> bool:
+    rel = os.path.relpath(path, root["path"])
+    if rel == os.curdir or rel.startswith(os.pardir):
+        return False
+    parts = rel.split(os.sep)
+    if len(parts) > 1 and (not root["recursive"] or len(parts) - 1 > root["max_depth"]):
+        return False
+    return all(matches_rules(root, d, is_dir=True) for d in parts[:-1]) and matches_rules(root, parts[-1])
+
+def load_cache(path: str) -> dict:
+    """scan_cache.json: {folder: {"mtime": ns, "rules": [...], "files": {name: [inode, size, mtime_ns]}, "dirs": [...]}}
+    hash_cache.json: {path: [size, mtime_ns, partial_hash, full_hash]}."""
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except:
+            pass
+    return {}
+
+def file_digest(path: str, size: int, partial: bool) -> str:
+    """Hash of the first and last PARTIAL_HASH_BYTES (the whole file if it is smaller than both), or of everything."""
+    import hashlib
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        if partial:
+            h.update(f.read(PARTIAL_HASH_BYTES))
+            if size > 2 * PARTIAL_HASH_BYTES:
+                f.seek(-PARTIAL_HASH_BYTES, os.SEEK_END)
+            h.update(f.read(PARTIAL_HASH_BYTES))
+        else:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+class ContentHasher:
+    """Finds files with identical content: same size, then same partial hash, then same full hash.
+    Hashes are cached by (path, size, mtime) so unchanged files are never read twice."""
+    def __init__(self, cache: dict, workers: int = 4):
+        self.cache = cache
+        self.workers = workers
+
+    def digests(self, files: dict[str, tuple[int, int]], partial: bool) -> dict[str, str]:
+        """files: {path: (size, mtime_ns)}. Unreadable files are left out."""
+        slot = 2 if partial else 3
+        out, todo = {}, []
+        for path, (size, mtime) in files.items():
+            entry = self.cache.get(path)
+            if entry and entry[0] == size and entry[1] == mtime and entry[slot]:
+                out[path] = entry[slot]
+            elif not partial and size <= 2 * PARTIAL_HASH_BYTES and path in self.cache and self.cache[path][2]:
+                out[path] = self.cache[path][2]  # the partial hash already covered the whole file
+            else:
+                todo.append(path)
+
+        def work(path):
+            try:
+                return path, file_digest(path, files[path][0], partial)
+            except OSError:
+                return path, None
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for path, digest in pool.map(work, todo):
+                if digest is None:
+                    continue
+                size, mtime = files[path]
+                entry = self.cache.get(path)
+                if not entry or entry[0] != size or entry[1] != mtime:
+                    entry = self.cache[path] = [size, mtime, None, None]
+                entry[slot] = digest
+                out[path] = digest
+        return out
+
+    def duplicates(self, new: dict[str, tuple[int, int]], old: dict[str, tuple[int, int]]) -> dict[str, str]:
+        """Maps each new path to the file it duplicates. Old (already stored) files win, then the oldest
+        modification time, then the path, so the same files always give the same original."""
+        files = {**old, **new}
+        groups = {}
+        for path, (size, _) in files.items():
+            if size:
+                groups.setdefault(size, []).append(path)  # every empty file would "match"
+        for partial in (True, False):
+            todo = {p: files[p] for g in groups.values() if len(g) > 1 and any(p in new for p in g) for p in g}
+            digests = self.digests(todo, partial)
+            groups = {}
+            for path in todo:
+                if path in digests:
+                    groups.setdefault((files[path][0], digests[path]), []).append(path)
+        result = {}
+        for group in groups.values():
+            if len(group) < 2:
+                continue
+            group.sort(key=lambda p: (p in new, files[p][1], p))
+            for path in group[1:]:
+                if path in new:
+                    result[path] = group[0]
+        return result
+
+    def save(self):
+        try:
+            write_atomic(HASH_CACHE_FILE, json.dumps(self.cache))
+        except OSError:
+            pass
+
+def snapshot_folder(folder: str) -> tuple[dict, dict, list]:
+    """One os.scandir pass: fingerprints and creation times for every file in `folder`, plus its subfolders.
+    On Windows the stat data comes with the directory listing, elsewhere it is one stat per file."""
+    files, ctimes, dirs = {}, {}, []
+    with os.scandir(folder) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.name)
+                    continue
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            files[entry.name] = [st.st_ino, st.st_size, st.st_mtime_ns]
+            ctimes[entry.name] = st.st_ctime
+    return files, ctimes, dirs
+
+def new_file_duplicates(paths: list[str], known: dict[str, str], workers: int = 4) -> dict[str, str]:
+    """content_dedup for files that just appeared (the folder watcher): new path -> the stored file, or
+    earlier new one, with the same content. Compares against the stored files (`known`) in the same folders."""
+    sizes = {}
+    for folder in {os.path.dirname(p) for p in paths}:
+        try:
+            files = snapshot_folder(folder)[0]
+        except OSError:
+            continue
+        sizes.update({os.path.join(folder, name): (fp[1], fp[2]) for name, fp in files.items()})
+    new = {p: sizes[p] for p in paths if p in sizes}
+    wanted = {size for size, _ in new.values()}
+    old = {p: v for p, v in sizes.items() if v[0] in wanted and p not in new and p in known}
+    hasher = ContentHasher(load_cache(HASH_CACHE_FILE), workers)
+    dupes = hasher.duplicates(new, old)
+    hasher.save()
+    return dupes
+
+def file_title(filename: str) -> str:
+    """Auto-import title: `report.pdf` -> `report (PDF)`."""
+    name_part, ext_part = os.path.splitext(filename)
+    return f"{name_part} ({ext_part.replace('.', '').upper()})"
+
+def plan_import(items: ItemIndex, paths: list[str], recursive: bool = True) -> tuple[list[tuple[str, str]], list[str]]:
+    """Bulk import without a dialog per file: (path, file_title) for every file not listed yet, and the
+    paths skipped because they are. Folders contribute their files (and subfolders' if recursive);
+    a file picked twice counts once. Dedup goes through the index, so it doesn't scan the data."""
+    files = []
+    for path in map(normalize_path, paths):
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for folder, dirs, names in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith(".")) if recursive else []
+            files += [os.path.join(folder, n) for n in sorted(names) if not n.startswith(".")]
+    plan, skipped, seen = [], [], set()
+    for path in files:
+        if path in seen:
+            continue
+        seen.add(path)
+        if items.find_path(path):
+            skipped.append(path)
+        else:
+            plan.append((path, file_title(os.path.basename(path))))
+    return plan, skipped
+
+def display_title(item: dict) -> str:
+    text = (item.get("title") or item.get("desc", "")) if "note" in item else item.get("desc", "")
+    return f"{text} (duplicate)" if item.get("duplicate_of") else text
+
+class Scanner:
+    """Finds new files under the scan roots and turns them into add ops; the caller decides how to apply them.
+    `progress(percent, text)` is rate limited, so it is safe to forward it across threads."""
+    def __init__(self, store, roots: list[dict], workers: int = 4, dedup: str = "off",
+                 known: dict | None = None, progress=None):
+        self.store = store
+        self.roots = roots
+        self.known = known or {}  # path -> id snapshot of what the caller already has
+        self.progress = progress or (lambda percent, text: None)
+        self.workers = max(1, workers)
+        self.dedup = dedup
+        self.cache = {}
+        self.hasher = None
+        self.last_progress = (0.0, -PROGRESS_STEP)  # (time, percent) of the last report
+
+    def report(self, percent: int, text: str):
+        """Rate-limited progress: a report per folder would flood a GUI thread on big trees."""
+        now = time.monotonic()
+        last_time, last_percent = self.last_progress
+        if percent < 100 and (now - last_time < PROGRESS_INTERVAL or percent - last_percent < PROGRESS_STEP):
+            return
+        self.last_progress = (now, percent)
+        self.progress(percent, text)
+
+    @staticmethod
+    def scan_dir(root: dict, folder: str, state: dict) -> tuple[dict, list]:
+        """Runs on the pool. Returns the folder's new cache entry and its new/changed files as (path, ctime),
+        leaving out downloads still in progress, like the folder watcher does."""
+        mtime = os.stat(folder).st_mtime_ns
+        rules = [root["include"], root["exclude"]]
+        if state.get("mtime") == mtime and state.get("rules") == rules:
+            return state, []  # nothing was added, removed or renamed in here since last time
+        files, ctimes, dirs = snapshot_folder(folder)
+        old_files = state.get("files", {}) if state.get("rules") == rules else {}
+        changed = [(os.path.join(folder, name), ctimes[name]) for name, fp in files.items()
+                   if old_files.get(name) != fp and matches_rules(root, name)
+                   and not name.lower().endswith(PARTIAL_DOWNLOAD_EXTS)]  # picked up once renamed
+        return {"mtime": mtime, "rules": rules, "files": files, "dirs": dirs}, changed
+
+    def run(self) -> tuple[list[dict], dict]:
+        """Scans every configured root (and subfolders, if recursive) and returns add ops for new files, dated
+        by creation time. Folders are scanned concurrently; only files whose fingerprint changed since the
+        cached scan are looked at. The stats are {scanned, new, skipped, errors, elapsed}."""
+        started = time.monotonic()
+        added = []
+        scanned = errors = 0
+        # path_id covers months a sharded store hasn't loaded; the snapshot covers everything else
+        known_id = self.store.path_id if hasattr(self.store, "path_id") else self.known.get
+
+        old_cache = load_cache(SCAN_CACHE_FILE) if self.known else {}  # no files stored yet: import everything again
+        self.cache = {}
+        candidates = []
+        seen = set()
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            jobs = {}
+
+            def submit(root, folder, depth):
+                if folder in seen:
+                    return
+                seen.add(folder)
+                jobs[pool.submit(self.scan_dir, root, folder, old_cache.get(folder, {}))] = (root, folder, depth)
+
+            for root in self.roots:
+                if os.path.isdir(root["path"]):
+                    submit(root, root["path"], 0)
+            done = 0
+            while jobs:
+                finished, _ = wait(jobs, return_when=FIRST_COMPLETED)
+                for job in finished:
+                    root, folder, depth = jobs.pop(job)
+                    done += 1
+                    try:
+                        state, changed = job.result()
+                    except OSError:
+                        # unreachable right now (network share, permissions): keep what we knew
+                        errors += 1
+                        if folder in old_cache:
+                            self.cache[folder] = old_cache[folder]
+                        continue
+                    self.cache[folder] = state
+                    if state is not old_cache.get(folder):
+                        scanned += len(state["files"])  # listed again, not cached
+                    candidates.extend(changed)
+                    if root["recursive"] and depth < root["max_depth"]:
+                        for name in state.get("dirs", []):
+                            if matches_rules(root, name, is_dir=True):
+                                submit(root, os.path.join(folder, name), depth + 1)
+                    percent = int(done * 100 / (done + len(jobs)))
+                    self.report(min(percent, 99), f"Scanning: {os.path.basename(folder)[:30]}... ({done} folders)")
+
+        METRICS.record("scan.folders", time.monotonic() - started)
+        METRICS.count("scan.files_listed", scanned)
+        METRICS.count("scan.folder_errors", errors)
+        fresh = [(p, ctime) for p, ctime in candidates if known_id(p) is None]
+        dupes = self.find_duplicates(fresh, known_id) if self.dedup in ("flag", "collapse") and fresh else {}
+        new_ids = {}
+        for full_path, ctime in fresh:
+            if full_path in new_ids:
+                continue
+            original = dupes.get(full_path)
+            if original and self.dedup == "collapse":
+                continue
+            # Get Windows Creation Time
+            date_str = str(datetime.date.fromtimestamp(ctime))
+            # Format name: Filename (.EXT)
+            item = {"id": new_item_id(), "desc": file_title(os.path.basename(full_path)), "path": full_path}
+            if original:
+                item["duplicate_of"] = new_ids.get(original) or known_id(original)
+            added.append({"op": "add", "date": date_str, "item": item})
+            new_ids[full_path] = item["id"]
+
+        self.progress(100, f"Added {len(added)} new files")
+        METRICS.record("scan.total", time.monotonic() - started)
+        return added, {"scanned": scanned, "new": len(added), "skipped": len(candidates) - len(added),
+                       "errors": errors, "elapsed": time.monotonic() - started}
+
+    @METRICS.timed("scan.dedup")
+    def find_duplicates(self, fresh: list[tuple], known_id) -> dict[str, str]:
+        """Compares new files against each other and against stored files in the scanned folders.
+        Sizes come from the scan cache, so only files sharing a size with a new one are ever opened."""
+        sizes = {os.path.join(folder, name): (fp[1], fp[2])
+                 for folder, state in self.cache.items() for name, fp in state.get("files", {}).items()}
+        new = {p: sizes[p] for p, _ in fresh if p in sizes}
+        wanted = {size for size, _ in new.values()}
+        old = {p: v for p, v in sizes.items() if v[0] in wanted and p not in new and known_id(p) is not None}
+        self.hasher = ContentHasher(load_cache(HASH_CACHE_FILE), self.workers)
+        self.report(99, f"Comparing {len(new)} new files...")
+        return self.hasher.duplicates(new, old)
+
+    def commit_cache(self):
+        """Called once the scan results are saved, so a crash before that rescans the folder."""
+        try:
+            write_atomic(SCAN_CACHE_FILE, json.dumps(self.cache))
+        except OSError:
+            pass
+        if self.hasher:
+            self.hasher.save()
+
+def diff_folder(folder: str, old: dict, new: dict) -> list[tuple]:
+    """Turns two snapshot_folder() fingerprint tables into created / moved / deleted events."""
+    events = []
+    gone = {tuple(fp): name for name, fp in old.items() if name not in new}
+    for name, fp in new.items():
+        if name in old:
+            continue
+        # same inode, size and mtime under a new name = rename (Windows reports inode 0, so no renames there)
+        src = gone.pop(tuple(fp), None) if fp[0] else None
+        if src:
+            events.append(("moved", os.path.join(folder, src), os.path.join(folder, name)))
+        else:
+            events.append(("created", os.path.join(folder, name), None))
+    events += [("deleted", os.path.join(folder, name), None) for name in gone.values()]
+    return events
+
+# ---------------- Launcher ---------------- #
+
+@functools.cache
+def opener_command() -> tuple | None:
+    """The platform's "open with the default app" command, looked up once. None on Windows (os.startfile)."""
+    if os.name == "nt":
+        return None
+    if sys.platform == "darwin":
+        return ("open",)
+    import shutil
+    for cmd in (("xdg-open",), ("gio", "open"), ("kde-open",), ("open",)):
+        if shutil.which(cmd[0]):
+            return cmd
+    return ("xdg-open",)
+
+class Launcher:
+    """Opens files and links off the caller's thread, one at a time, in the order asked.
+    A file is checked for existence first, with EXISTS_TIMEOUT so a dead network drive can't
+    hang the queue; the opener is started detached and never waited for. Problems go to
+    `on_error(target, message)`, called on the launcher's thread."""
+    def __init__(self, on_error=None):
+        self.on_error = on_error or (lambda target, message: None)
+        self.queue = deque()
+        self.wake = threading.Condition()
+        self.thread = None
+
+    def open_path(self, path: str):
+        self._put([("path", path)])
+
+    def open_url(self, url: str):
+        self._put([("url", url)])
+
+    def open_all(self, paths: list[str]):
+        self._put([("path", p) for p in paths], gap=True)
+
+    def _put(self, jobs: list, gap: bool = False):
+        with self.wake:
+            self.queue.extend((kind, target, gap and i > 0) for i, (kind, target) in enumerate(jobs))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="launcher", daemon=True)
+                self.thread.start()
+            self.wake.notify()
+
+    def _run(self):
+        while True:
+            with self.wake:
+                while not self.queue:
+                    self.wake.wait()
+                kind, target, gap = self.queue.popleft()
+            if gap:
+                time.sleep(LAUNCH_GAP)
+            started = time.monotonic()
+            try:
+                if kind == "url":
+                    import webbrowser
+                    webbrowser.open(target)
+                elif self._exists(target):
+                    self._launch(target)
+            except Exception as e:
+                self.on_error(target, f"Could not open it: {e}")
+            METRICS.record(f"launch.{kind}", time.monotonic() - started)
+
+    def _exists(self, path: str) -> bool:
+        """Each check gets its own daemon thread: one stuck on a dead drive is left behind
+        and can never hold up the checks for other files."""
+        found = []
+        check = threading.Thread(target=lambda: found.append(os.path.exists(path)), name="exists", daemon=True)
+        check.start()
+        check.join(EXISTS_TIMEOUT)
+        if check.is_alive():
+            self.on_error(path, "The drive holding this file is not responding.")
+        elif found[0]:
+            return True
+        else:
+            self.on_error(path, "File not found!")
+        return False
+
+    def _launch(self, path: str):
+        cmd = opener_command()
+        if cmd is None:
+            return os.startfile(path)
+        import subprocess
+        subprocess.Popen(cmd + (path,), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                         close_fds=True, start_new_session=True)  # detached; the child is never waited on
+
+# ---------------- Path health ---------------- #
+
+def volume_of(path: str) -> str:
+    """The drive or share a path lives on, guessed from the path alone so it costs no I/O:
+    "c:", "\\\\server\\share", or the first two levels on POSIX ("/mnt/nas", "/home/me")."""
+    drive, _ = os.path.splitdrive(path)
+    return drive.lower() if drive else os.sep.join(path.split(os.sep)[:3])
+
+class PathHealth:
+    """Checks that stored file paths still exist, a batch at a time, without hammering anything:
+    at most HEALTH_RATE checks a second and HEALTH_PER_VOLUME at once per drive. A drive that stops
+    answering for EXISTS_TIMEOUT is left alone for the rest of the run. Listing a folder while looking
+    for moved files counts as a check too.
+
+    cache (path_health.json): {path: [status, checked_at, moved_to]}, status "ok", "missing",
+    "moved" or "offline". It is saved after every batch and fresh results are skipped, so a run
+    that is stopped picks up where it left off."""
+    def __init__(self, cache: dict, stop: threading.Event | None = None):
+        self.cache = cache
+        self.stop = stop or threading.Event()
+
+    def due(self, paths, now: float | None = None) -> list[str]:
+        """Paths never checked or checked more than HEALTH_RECHECK ago, oldest result first."""
+        now = now or time.time()
+        due = [p for p in paths if now - self.cache.get(p, (None, 0))[1] > HEALTH_RECHECK]
+        return sorted(due, key=lambda p: self.cache.get(p, (None, 0))[1])
+
+    def run(self, paths, search: list[str] = (), on_batch=None) -> dict:
+        """Checks the due paths. Missing ones are looked for by name under `search` (and their old
+        folder), walked at most once per run and for at most HEALTH_WALK_TIME; a single match is
+        recorded as "moved". on_batch({path: entry}) follows each save.
+        Returns {checked, ok, missing, moved, offline}."""
+        stats = dict.fromkeys(("checked", "ok", "missing", "moved", "offline"), 0)
+        todo, known = self.due(paths), set(paths)
+        slots, dead = {}, set()  # volume -> semaphore; volumes that stopped answering
+        self.names, self.listed = {}, set()  # this run's walk: lower-case file name -> {path}; folders done
+        deadline = time.monotonic() + HEALTH_WALK_TIME
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        pool = ThreadPoolExecutor(max_workers=HEALTH_WORKERS, thread_name_prefix="health")
+        try:
+            for start in range(0, len(todo), HEALTH_BATCH):
+                if self.stop.is_set():
+                    break
+                jobs = {}
+                for path in todo[start:start + HEALTH_BATCH]:
+                    volume = volume_of(path)
+                    if volume in dead:
+                        continue  # left unchecked, so the next run tries again
+                    slot = slots.setdefault(volume, threading.BoundedSemaphore(HEALTH_PER_VOLUME))
+                    jobs[pool.submit(self._check, path, slot)] = path
+                    time.sleep(1 / HEALTH_RATE)
+                results, pending = {}, set(jobs)
+                while pending:
+                    done, pending = wait(pending, timeout=EXISTS_TIMEOUT, return_when=FIRST_COMPLETED)
+                    if not done:
+                        break  # nothing answered for EXISTS_TIMEOUT
+                    for job in done:
+                        results[jobs[job]] = job.result()
+                for job in pending:
+                    if job.cancel():
+                        continue
+                    results[jobs[job]] = "offline"
+                    dead.add(volume_of(jobs[job]))
+                dead.update(volume_of(p) for p, status in results.items() if status == "offline")
+                missing = [p for p, status in results.items() if status == "missing"]
+                if missing:
+                    folders = list(search) + sorted({os.path.dirname(p) for p in missing})
+                    self.walk(folders, pool, slots, dead, deadline)
+                moved = self.find_moved(missing, known)
+                now, batch = time.time(), {}
+                for path, status in results.items():
+                    status = "moved" if path in moved else status
+                    batch[path] = self.cache[path] = [status, now, moved.get(path)]
+                    stats[status] += 1
+                stats["checked"] += len(results)
+                self.save()
+                if on_batch:
+                    on_batch(batch)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)  # a stat stuck on a dead share must not hold us
+        return stats
+
+    def _check(self, path: str, slot) -> str:
+        if not slot.acquire(timeout=EXISTS_TIMEOUT):
+            return "offline"  # the drive's other checks are hanging
+        try:
+            os.stat(path)
+            return "ok"
+        except (FileNotFoundError, NotADirectoryError):
+            return "missing"
+        except PermissionError:
+            return "ok"  # there, just not ours to read
+        except OSError:
+            return "offline"
+        finally:
+            slot.release()
+
+    def walk(self, tops: list[str], pool, slots: dict, dead: set, deadline: float, max_depth: int = 3):
+        """Lists `tops` down to max_depth into self.names, skipping folders this run has already listed,
+        so every batch reuses one walk. Stops at `deadline`; what was found so far is kept."""
+        from concurrent.futures import wait
+        queue = deque((top, 0) for top in tops)
+        while queue and not self.stop.is_set() and time.monotonic() < deadline:
+            folder, depth = queue.popleft()
+            volume = volume_of(folder)
+            if folder in self.listed or volume in dead:
+                continue
+            self.listed.add(folder)
+            slot = slots.setdefault(volume, threading.BoundedSemaphore(HEALTH_PER_VOLUME))
+            job = pool.submit(self._list, folder, slot)
+            done = wait([job], timeout=EXISTS_TIMEOUT)[0]
+            entries = job.result() if done else None
+            if entries is None:
+                if not job.cancel():
+                    dead.add(volume)  # it started and hangs, or the drive said so
+                continue
+            for name, is_dir in entries:
+                path = os.path.join(folder, name)
+                if not is_dir:
+                    self.names.setdefault(name.lower(), set()).add(path)
+                elif depth < max_depth:
+                    queue.append((path, depth + 1))
+            time.sleep(1 / HEALTH_RATE)
+
+    def _list(self, folder: str, slot) -> list[tuple[str, bool]] | None:
+        """[(name, is_dir)], or None if the folder's drive isn't answering."""
+        if not slot.acquire(timeout=EXISTS_TIMEOUT):
+            return None
+        try:
+            with os.scandir(folder) as it:
+                return [(entry.name, entry.is_dir(follow_symlinks=False)) for entry in it]
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            return []
+        except OSError:
+            return None
+        finally:
+            slot.release()
+
+    def find_moved(self, missing: list[str], known: set) -> dict[str, str]:
+        """{missing path: new path} for names this run's walk found exactly once. Files that are
+        already in the list don't count."""
+        wanted = {}
+        for path in missing:
+            wanted.setdefault(os.path.basename(path).lower(), []).append(path)
+        found = {name: self.names.get(name, set()) - known for name in wanted}
+        return {p: next(iter(found[name])) for name, paths in wanted.items() if len(found[name]) == 1 for p in paths}
+
+    def save(self):
+        try:
+            write_atomic(HEALTH_CACHE_FILE, json.dumps(self.cache))
+        except OSError:
+            pass
+
+# ---------------- Library ---------------- #
+
+EXPORT_COLUMNS = ("date", "kind", "title", "path", "url", "note")
+
+class Library:
+    """Store + ItemIndex + SearchIndex behind one object: the API the CLI, scripts and the simpler
+    app variants use. Every mutating call commits its ops in one go; close() settles the store."""
+    def __init__(self, settings: dict | None = None, store=None):
+        self.settings = settings or load_settings()
+        self.store = store or open_store(self.settings)
+        self.data = self.store.load()
+        self.items = ItemIndex(self.data)
+        self.index = None  # SearchIndex, built on the first search
+
+    def load_everything(self):
+        """A sharded store only loads recent months; scripts and exports want all of them."""
+        if not hasattr(self.store, "unloaded"):
+            return
+        for month in sorted({d[:7] for d in self.store.unloaded()}):
+            for date, items in self.store.load_month(month).items():
+                self.items.merge_day(date, items)
+
+    def commit(self, *ops: dict):
+        if not ops:
+            return
+        if self.index:
+            for op in ops:
+                self.index.apply(op)
+        self.store.append(list(ops))
+        self.store.maybe_compact(self.data)
+
+    def known_paths(self) -> dict[str, str]:
+        return {path: next(iter(ids)) for path, ids in self.items.by_path.items()}
+
+    def import_files(self, paths: list[str], date: str | None = None, recursive: bool = True,
+                     titles: dict | None = None) -> tuple[list[dict], list[str]]:
+        """Adds files and folders via plan_import() in one commit; `titles` overrides the automatic title
+        per path. Returns the add ops and the paths skipped as already listed."""
+        date = date or str(datetime.date.today())
+        plan, skipped = plan_import(self.items, paths, recursive)
+        titles = titles or {}
+        ops = [self.items.add(date, {"id": new_item_id(), "desc": titles.get(path, title), "path": path})
+               for path, title in plan]
+        self.commit(*ops)
+        return ops, skipped
+
+    def search(self, query: str) -> list[tuple[str, list[dict]]]:
+        """(date, items) newest first. Like the search box: a query matching the date keeps the whole day."""
+        query = query.lower().strip()
+        self.load_everything()
+        if self.index is None:
+            self.index = SearchIndex()
+            self.index.build(self.data)
+        hits = self.index.search(query)
+        if hits is None:  # no word characters: plain substring scan
+            hits = {it["id"]: d for d, items in self.data.items() for it in items if query in str(it).lower()}
+        groups = []
+        for date in self.items.dates.newest():
+            items = self.data[date] if query in date.lower() else [it for it in self.data[date] if it["id"] in hits]
+            if items:
+                groups.append((date, items))
+        return groups
+
+    def scan(self, roots: list | None = None, progress=None) -> dict:
+        """Runs the Downloads scanner in this thread and commits what it finds as one batch.
+        `roots` takes the same entries as settings["scan_roots"]; by default the configured ones are used."""
+        roots = scan_roots({"scan_roots": roots} if roots else self.settings)
+        scanner = Scanner(self.store, roots, self.settings["scan_workers"],
+                          self.settings["content_dedup"], self.known_paths(), progress)
+        added, stats = scanner.run()
+        ops = [self.items.add(op["date"], op["item"]) for op in added if not self.items.find_path(op["item"]["path"])]
+        self.commit(*ops)
+        scanner.commit_cache()
+        stats["new"] = len(ops)
+        return stats
+
+    def check_paths(self, on_batch=None) -> tuple[dict, dict]:
+        """Runs the path-health check over every stored file.
+        Returns (stats, {path: [status, checked_at, moved_to]})."""
+        self.load_everything()
+        health = PathHealth(load_cache(HEALTH_CACHE_FILE))
+        stats = health.run(list(self.items.by_path), [r["path"] for r in scan_roots(self.settings)], on_batch)
+        return stats, {p: health.cache[p] for p in self.items.by_path if p in health.cache}
+
+    def clean_paths(self, health: dict, relink: bool = True, remove_missing: bool = False) -> list[dict]:
+        """Bulk fix-up after check_paths, as one commit: moved files get their new path, missing ones
+        can be removed. Offline drives are never touched."""
+        ops = []
+        for path, (status, _, moved_to) in health.items():
+            for item_id in list(self.items.by_path.get(path, ())):
+                if status == "moved" and relink and moved_to:
+                    ops.append(self.items.edit(item_id, {"path": moved_to}))
+                elif status == "missing" and remove_missing:
+                    ops.append(self.items.delete(item_id))
+        self.commit(*ops)
+        return ops
+
+    def export(self, path: str, fmt: str = "json"):
+        """Writes every item, as file_data.json-style JSON or as one CSV row per item."""
+        self.load_everything()
+        if fmt == "csv":
+            import csv, io
+            out = io.StringIO()
+            writer = csv.writer(out)
+            writer.writerow(EXPORT_COLUMNS)
+            for date in self.items.dates.newest():
+                for it in self.data[date]:
+                    writer.writerow([date, item_kind(it), it.get("title") if "note" in it else it.get("desc", ""),
+                                     it.get("path", ""), it.get("url", ""), it.get("note", "")])
+            write_atomic(path, out.getvalue())
+        else:
+            write_atomic(path, json.dumps(self.data, indent=2, ensure_ascii=False))
+
+    def close(self):
+        self.store.close(self.data)
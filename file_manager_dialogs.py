@@ -0,0 +1,250 @@
+"""The File Manager's dialogs. None of them is needed for the first window, so MainWindow imports
+this module the first time one is opened instead of at startup."""
+from __future__ import annotations
+import os, json
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import (
+    QMainWindow, QDialog, QDialogButtonBox, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel, QLineEdit,
+    QPlainTextEdit, QPushButton, QFileDialog, QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView,
+    QAbstractItemView
+)
+
+from file_manager_core import METRICS, write_atomic, display_title, HEALTH_MARKERS, BASE_DIR
+
+DIAGNOSTICS_FILE = os.path.join(BASE_DIR, "diagnostics.json")
+
+# ---------------- Dialogs ---------------- #
+
+class TitleInputDialog(QDialog):
+    def __init__(self, filename: str, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("File Title")
+        self.setModal(True)
+        layout = QVBoxLayout(self)
+        lbl = QLabel(f"Enter title for:\n{os.path.basename(filename)}")
+        self.edit = QLineEdit()
+        self.edit.setFont(QFont("Segoe UI", 12))
+        self.edit.setPlaceholderText(os.path.basename(filename))
+        layout.addWidget(lbl)
+        layout.addWidget(self.edit)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Save |
+                                   QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def value(self) -> str:
+        text = self.edit.text().strip()
+        return text if text else self.edit.placeholderText()
+
+class BulkImportDialog(QDialog):
+    """One grid for a whole batch instead of a TitleInputDialog per file: titles start out as file_title()
+    and can be edited in place; unticked rows are left out."""
+    def __init__(self, plan: list[tuple[str, str]], skipped: int, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Import {len(plan)} files")
+        self.resize(640, 480)
+        self.plan = plan
+        v = QVBoxLayout(self)
+        if skipped:
+            v.addWidget(QLabel(f"{skipped} already in the list and skipped."))
+        self.table = QTableWidget(len(plan), 2)
+        self.table.setHorizontalHeaderLabels(["Title", "File"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        triggers = QAbstractItemView.EditTrigger
+        self.table.setEditTriggers(triggers.DoubleClicked | triggers.EditKeyPressed | triggers.AnyKeyPressed)
+        self.table.setUpdatesEnabled(False)
+        for row, (path, title) in enumerate(plan):
+            cell = QTableWidgetItem(title)
+            cell.setFlags(cell.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            cell.setCheckState(Qt.CheckState.Checked)
+            self.table.setItem(row, 0, cell)
+            cell = QTableWidgetItem(path)
+            cell.setFlags(cell.flags() & ~Qt.ItemFlag.ItemIsEditable)
+            cell.setToolTip(path)
+            self.table.setItem(row, 1, cell)
+        self.table.setUpdatesEnabled(True)
+        v.addWidget(self.table)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Cancel)
+        buttons.addButton("Import", QDialogButtonBox.ButtonRole.AcceptRole).setDefault(True)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        v.addWidget(buttons)
+
+    def rows(self) -> list[tuple[str, str]]:
+        """(path, title) of the ticked rows; an emptied title falls back to the automatic one."""
+        rows = []
+        for row, (path, title) in enumerate(self.plan):
+            cell = self.table.item(row, 0)
+            if cell.checkState() == Qt.CheckState.Checked:
+                rows.append((path, cell.text().strip() or title))
+        return rows
+
+class NoteDialog(QDialog):
+    def __init__(self, title_text: str = "", note_text: str = "", parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("📝 Add / Edit Note")
+        self.resize(400, 350)
+        form = QFormLayout(self)
+        self.title_edit = QLineEdit()
+        self.title_edit.setFont(QFont("Segoe UI", 12))
+        self.title_edit.setText(title_text)
+        self.title_edit.setPlaceholderText("Untitled Note")
+        form.addRow("Title:", self.title_edit)
+        self.note_edit = QPlainTextEdit()
+        # only this dialog has one, so the rule lives here rather than in the window's startup style sheet
+        self.note_edit.setStyleSheet("QPlainTextEdit { padding: 6px 8px; border-radius: 6px; "
+                                     "border: 1px solid #c9c9c9; background: #fff; }")
+        self.note_edit.setPlainText(note_text)
+        self.note_edit.setPlaceholderText("Write your note here...")
+        form.addRow("Note:", self.note_edit)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Save |
+                                   QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        form.addRow(buttons)
+    def get(self):
+        title = self.title_edit.text().strip() or "Untitled Note"
+        note = self.note_edit.toPlainText().strip()
+        return title, note
+
+class LinkDialog(QDialog):
+    def __init__(self, title_text: str = "", url_text: str = "", parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("🔗 Add Link")
+        self.resize(400, 200)
+        form = QFormLayout(self)
+        self.title_edit = QLineEdit()
+        self.title_edit.setFont(QFont("Segoe UI", 12))
+        self.title_edit.setText(title_text)
+        self.title_edit.setPlaceholderText("Untitled Link")
+        form.addRow("Title:", self.title_edit)
+        self.url_edit = QLineEdit()
+        self.url_edit.setFont(QFont("Segoe UI", 12))
+        self.url_edit.setText(url_text)
+        self.url_edit.setPlaceholderText("https://example.com")
+        form.addRow("URL:", self.url_edit)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Save |
+                                   QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        form.addRow(buttons)
+    def get(self):
+        title = self.title_edit.text().strip() or "Untitled Link"
+        url = self.url_edit.text().strip()
+        return title, url
+
+class RenameDialog(QDialog):
+    def __init__(self, current: str, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Rename Item")
+        self.resize(400, 150)
+        v = QVBoxLayout(self)
+        v.addWidget(QLabel("Enter new title:"))
+        self.edit = QLineEdit(current)
+        self.edit.setFont(QFont("Segoe UI", 12))
+        v.addWidget(self.edit)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Save |
+                                   QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        v.addWidget(buttons)
+    def value(self):
+        return self.edit.text().strip()
+
+class BrokenPathsDialog(QDialog):
+    """Files the path check found missing or moved. Moved ones can be pointed at where they were
+    found, ticked ones removed from the list; both happen as one batch."""
+    COLUMNS = ("Title", "Status", "Stored path", "Found at")
+
+    def __init__(self, broken: list[tuple[str, dict, list]], parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"{len(broken)} files not where they were")
+        self.resize(760, 420)
+        self.broken = broken
+        self.action = None  # "relink" or "remove" once accepted
+        v = QVBoxLayout(self)
+        self.table = QTableWidget(len(broken), len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        for row, (date, item, (status, _, moved_to)) in enumerate(broken):
+            cell = QTableWidgetItem(display_title(item))
+            cell.setFlags(cell.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            cell.setCheckState(Qt.CheckState.Checked)
+            self.table.setItem(row, 0, cell)
+            for col, text in enumerate((HEALTH_MARKERS[status], item["path"], moved_to or ""), 1):
+                cell = QTableWidgetItem(text)
+                cell.setToolTip(text)
+                self.table.setItem(row, col, cell)
+        v.addWidget(self.table)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        relink = buttons.addButton("Relink moved", QDialogButtonBox.ButtonRole.AcceptRole)
+        relink.setEnabled(any(entry[0] == "moved" for _, _, entry in broken))
+        relink.clicked.connect(lambda: self.finish("relink"))
+        remove = buttons.addButton("Remove ticked", QDialogButtonBox.ButtonRole.DestructiveRole)
+        remove.clicked.connect(lambda: self.finish("remove"))
+        buttons.rejected.connect(self.reject)
+        v.addWidget(buttons)
+
+    def finish(self, action: str):
+        self.action = action
+        self.accept()
+
+    def ticked(self) -> list[tuple[dict, list]]:
+        return [(item, entry) for row, (_, item, entry) in enumerate(self.broken)
+                if self.table.item(row, 0).checkState() == Qt.CheckState.Checked]
+
+class DiagnosticsDialog(QDialog):
+    """Hidden (Ctrl+Shift+D): counters, latency histograms, widget count and memory of this session."""
+    def __init__(self, app: QMainWindow):
+        super().__init__(app)
+        self.app = app
+        self.setWindowTitle("Diagnostics")
+        self.resize(520, 480)
+        v = QVBoxLayout(self)
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFont("Consolas", 9))
+        v.addWidget(self.text)
+        row = QHBoxLayout()
+        for label, handler in (("Refresh", self.refresh), ("Reset", self.reset), ("Export…", self.export)):
+            btn = QPushButton(label)
+            btn.clicked.connect(handler)
+            row.addWidget(btn)
+        v.addLayout(row)
+
+    def refresh(self):
+        report = self.app.diagnostics_report()
+        rss = report["rss_bytes"]
+        state = "on" if report["enabled"] else 'off (set "diagnostics": true in settings.json)'
+        lines = [f"Instrumentation: {state}",
+                 f"Memory (RSS): {rss / 2**20:.1f} MB" if rss else "Memory (RSS): unavailable",
+                 f"Widgets: {report['widgets']}  sections: {report['sections']}  row widgets: {report['row_widgets']}",
+                 f"Items loaded: {report['items']}  days not loaded: {report['dates_not_loaded']}", ""]
+        for name, m in sorted(report["latencies"].items()):
+            lines.append(f"{name}: {m['calls']} calls  p50 {m['p50_ms']} ms  p95 {m['p95_ms']} ms  "
+                         f"max {m['max_ms']} ms")
+            lines.append("    " + "  ".join(f"{b} {n}" for b, n in m["histogram"].items()))
+        if report["counters"]:
+            lines.append("")
+        lines += [f"{name}: {value}" for name, value in sorted(report["counters"].items())]
+        self.text.setPlainText("\n".join(lines))
+
+    def reset(self):
+        METRICS.reset()
+        self.refresh()
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export diagnostics", DIAGNOSTICS_FILE, "JSON (*.json)")
+        if not path:
+            return
+        try:
+            write_atomic(path, json.dumps(self.app.diagnostics_report(), indent=2))
+        except OSError:
+            QMessageBox.critical(self, "Error", "Failed to export diagnostics.")
@@ -0,0 +1,5 @@
+import os, sys, tempfile
+
+# the core reads FILE_MANAGER_DATA on import; keep anything it might write out of the checkout
+os.environ.setdefault("FILE_MANAGER_DATA", tempfile.mkdtemp(prefix="file_manager_tests_"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
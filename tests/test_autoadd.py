@@ -0,0 +1,66 @@
+"""Auto-Add: content duplicates, the folder scan and its cache."""
+import os
+
+import file_manager_core as core
+
+def write(path, data: bytes, mtime: int) -> str:
+    path.write_bytes(data)
+    os.utime(path, ns=(mtime, mtime))
+    return str(path)
+
+def fingerprints(*paths: str) -> dict:
+    return {p: (os.stat(p).st_size, os.stat(p).st_mtime_ns) for p in paths}
+
+# ---------------- Content duplicates ---------------- #
+
+def test_oldest_copy_is_the_original(tmp_path):
+    newer = write(tmp_path / "a.pdf", b"same", 2_000_000_000_000_000_000)
+    older = write(tmp_path / "b.pdf", b"same", 1_000_000_000_000_000_000)
+    fresh = write(tmp_path / "c.pdf", b"same", 3_000_000_000_000_000_000)
+    for old in (fingerprints(newer, older), fingerprints(older, newer)):  # whatever order the store lists them in
+        assert core.ContentHasher({}).duplicates(fingerprints(fresh), old) == {fresh: older}
+
+def test_new_copies_point_at_the_oldest_new_one(tmp_path):
+    late = write(tmp_path / "a.pdf", b"same", 2_000_000_000_000_000_000)
+    early = write(tmp_path / "b.pdf", b"same", 1_000_000_000_000_000_000)
+    tie = write(tmp_path / "c.pdf", b"same", 1_000_000_000_000_000_000)
+    other = write(tmp_path / "d.pdf", b"diff", 1_000_000_000_000_000_000)
+    dupes = core.ContentHasher({}).duplicates(fingerprints(late, tie, other, early), {})
+    assert dupes == {late: early, tie: early}  # equal times: the path decides
+
+# ---------------- Folder scan ---------------- #
+
+def scanner(tmp_path, known=None, recursive=False) -> core.Scanner:
+    store = core.JournalStore(str(tmp_path / "file_data.json"), str(tmp_path / "file_data.json.journal"))
+    roots = core.scan_roots({"scan_roots": [{"path": str(tmp_path / "downloads"), "recursive": recursive}]})
+    return core.Scanner(store, roots, known=known)
+
+def test_downloads_in_progress_are_skipped(tmp_path):
+    (tmp_path / "downloads").mkdir()
+    (tmp_path / "downloads" / "done.pdf").write_bytes(b"x")
+    for name in ("movie.mp4.crdownload", "setup.exe.part", "Song.MP3.PART"):
+        (tmp_path / "downloads" / name).write_bytes(b"x")
+    added = scanner(tmp_path).run()[0]
+    assert [op["item"]["path"] for op in added] == [str(tmp_path / "downloads" / "done.pdf")]
+
+def test_unchanged_folders_come_from_the_scan_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, "SCAN_CACHE_FILE", str(tmp_path / "scan_cache.json"))
+    downloads = tmp_path / "downloads"
+    (downloads / "sub").mkdir(parents=True)
+    for path in (downloads / "a.pdf", downloads / "sub" / "b.pdf"):
+        path.write_bytes(b"x")
+
+    def scan(known):
+        s = scanner(tmp_path, known, recursive=True)
+        added, stats = s.run()
+        s.commit_cache()
+        return sorted(os.path.basename(op["item"]["path"]) for op in added), stats
+
+    assert scan({})[0] == ["a.pdf", "b.pdf"]  # nothing stored yet: the cache isn't trusted
+    known = {str(downloads / "a.pdf"): "1", str(downloads / "sub" / "b.pdf"): "2"}
+    added, stats = scan(known)
+    assert (added, stats["scanned"]) == ([], 0)  # neither folder was listed again
+    (downloads / "c.pdf").write_bytes(b"x")
+    os.utime(downloads, ns=(1, 1))  # a new name changes the folder's mtime
+    added, stats = scan(known)
+    assert (added, stats["scanned"], stats["skipped"]) == (["c.pdf"], 2, 0)  # only the top folder, only c.pdf looked at
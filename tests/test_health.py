@@ -0,0 +1,45 @@
+"""Path health: missing and moved files, and how much of the disk a run touches."""
+import os
+
+import file_manager_core as core
+
+def make_files(tmp_path, names) -> list[str]:
+    (tmp_path / "docs" / "archive").mkdir(parents=True)
+    paths = []
+    for name in names:
+        (tmp_path / "docs" / name).write_text(name)
+        paths.append(str(tmp_path / "docs" / name))
+    return paths
+
+def test_moved_and_missing(tmp_path):
+    paths = make_files(tmp_path, ["a.txt", "b.txt", "c.txt"])
+    os.rename(paths[0], tmp_path / "docs" / "archive" / "a.txt")
+    os.remove(paths[1])
+    health = core.PathHealth({})
+    stats = health.run(paths, [str(tmp_path)])
+    assert stats == {"checked": 3, "ok": 1, "missing": 1, "moved": 1, "offline": 0}
+    assert health.cache[paths[0]][::2] == ["moved", str(tmp_path / "docs" / "archive" / "a.txt")]
+    assert health.cache[paths[1]][0] == "missing"
+    assert health.run(paths, [str(tmp_path)])["checked"] == 0  # fresh results are skipped
+
+def test_one_walk_per_run(tmp_path, monkeypatch):
+    paths = make_files(tmp_path, [f"f{i}.txt" for i in range(6)])
+    for path in paths:
+        os.rename(path, tmp_path / "docs" / "archive" / os.path.basename(path))
+    monkeypatch.setattr(core, "HEALTH_BATCH", 2)
+    listed, real_list = [], core.PathHealth._list
+
+    def counted_list(self, folder, slot):
+        listed.append(folder)
+        return real_list(self, folder, slot)
+
+    monkeypatch.setattr(core.PathHealth, "_list", counted_list)
+    stats = core.PathHealth({}).run(paths, [str(tmp_path)])
+    assert stats["moved"] == 6
+    assert sorted(listed) == sorted({str(tmp_path), str(tmp_path / "docs"), str(tmp_path / "docs" / "archive")})
+
+def test_walk_stops_at_the_deadline(tmp_path, monkeypatch):
+    paths = make_files(tmp_path, ["a.txt"])
+    os.rename(paths[0], tmp_path / "docs" / "archive" / "a.txt")
+    monkeypatch.setattr(core, "HEALTH_WALK_TIME", 0)
+    assert core.PathHealth({}).run(paths, [str(tmp_path)])["missing"] == 1  # not searched for, not guessed
@@ -0,0 +1,89 @@
+"""The search index against a brute-force substring filter, before and after edits, and the date order."""
+import random
+
+import file_manager_core as core
+
+WORDS = ("report", "reports", "re", "a", "pdf", "x1", "notes", "meeting", "2024", "2024-01", "invoice", "port")
+QUERIES = ("report", "re", "a", "por", "x", "2024-0", "meeting notes", "re pdf", "a x1", "zz", "port rep", "-")
+
+def make_data(rng: random.Random, n: int) -> dict:
+    data = {}
+    for i in range(n):
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+        item = rng.choice(({"desc": words, "path": f"/downloads/{rng.choice(WORDS)}.txt"},
+                           {"title": words, "note": " ".join(rng.choice(WORDS) for _ in range(5))},
+                           {"desc": words, "url": f"https://example.com/{rng.choice(WORDS)}"}))
+        item["id"] = f"i{i}"
+        data.setdefault(f"2024-01-{rng.randint(1, 28):02}", []).append(item)
+    return data
+
+def brute_force(data: dict, query: str) -> dict | None:
+    terms = core.TOKEN_RE.findall(query.lower())
+    if not terms:
+        return None
+    tokens = lambda item: core.TOKEN_RE.findall(core.searchable_text(item).lower())
+    return {item["id"]: date for date, items in data.items() for item in items
+            if all(any(term in tok for tok in tokens(item)) for term in terms)}
+
+def check(index: core.SearchIndex, data: dict):
+    for query in QUERIES + QUERIES:  # the second round is answered from the `common` cache
+        assert index.search(query) == brute_force(data, query), query
+
+# ---------------- Search index ---------------- #
+
+def test_index_matches_brute_force():
+    rng = random.Random(3)
+    data = make_data(rng, 600)
+    index = core.SearchIndex()
+    index.build(data)
+    check(index, data)
+
+def test_index_follows_ops():
+    rng = random.Random(4)
+    data = make_data(rng, 300)
+    index = core.SearchIndex()
+    index.build(data)
+    check(index, data)  # fills `common`, which the ops below must keep current
+    ids = [(date, item["id"]) for date, items in data.items() for item in items]
+    for n in range(60):
+        date, item_id = rng.choice(ids)
+        if n % 3 == 0:
+            item = {"id": f"new{n}", "desc": "a x1 report " + rng.choice(WORDS)}
+            op = {"op": "add", "date": "2024-02-01", "item": item}
+        elif n % 3 == 1:
+            op = {"op": "edit", "date": date, "id": item_id, "fields": {"desc": rng.choice(WORDS)}}
+        else:
+            op = {"op": "delete", "date": date, "id": item_id}
+        core.apply_op(data, op)
+        if op["op"] == "add":
+            op = dict(op, item=data[op["date"]][-1])  # the index re-reads edited items from the live dicts
+        index.apply(op)
+        ids = [(date, item["id"]) for date, items in data.items() for item in items]
+    check(index, data)
+
+def test_ops_during_build_are_applied_after_it():
+    data = {"2024-01-01": [{"id": "a", "desc": "report"}]}
+    index = core.SearchIndex()
+    assert index.search("report") is None  # not built yet
+    index.apply({"op": "add", "date": "2024-01-02", "item": {"id": "b", "desc": "reports"}})
+    index.build(data)
+    assert index.search("report") == {"a": "2024-01-01", "b": "2024-01-02"}
+
+# ---------------- Date order ---------------- #
+
+def test_date_order_stays_sorted():
+    order = core.DateOrder(["2024-02-10", "2023-12-31", "2024-01-05", "2024-01-05"])
+    order.add("2024-01-20")
+    order.add("2024-01-20")
+    order.discard("2023-12-31")
+    order.discard("1999-01-01")
+    assert list(order.newest()) == ["2024-02-10", "2024-01-20", "2024-01-05"]
+    assert len(order) == 3 and "2024-01-20" in order and "2023-12-31" not in order
+
+def test_date_order_month_and_year_keys():
+    order = core.DateOrder(["2023-12-31", "2024-01-05", "2024-01-20", "2024-02-10"])
+    assert order.within("2024-01") == ["2024-01-20", "2024-01-05"]
+    assert order.within("2024") == ["2024-02-10", "2024-01-20", "2024-01-05"]
+    assert order.within("2024-01-05") == ["2024-01-05"]
+    assert list(order.newest(before="2024-01")) == ["2023-12-31"]
+    assert list(order.newest(before="2024-01-20")) == ["2024-01-05", "2023-12-31"]
@@ -0,0 +1,142 @@
+"""Behaviour of the stores across crashes, and a round trip through every storage format."""
+import os, json
+import pytest
+
+import file_manager_core as core
+
+DATA = {
+    "2024-01-05": [{"id": "f1", "desc": "report (PDF)", "path": "/downloads/report.pdf"},
+                   {"id": "n1", "title": "Groceries", "note": "milk\neggs"}],
+    "2024-02-10": [{"id": "l1", "desc": "Docs", "url": "https://example.com"},
+                   {"id": "f2", "desc": "copy (PDF)", "path": "/downloads/copy.pdf", "duplicate_of": "f1"}],
+}
+OPS = [
+    {"op": "add", "date": "2024-02-10", "item": {"id": "f3", "desc": "new (TXT)", "path": "/downloads/new.txt"}},
+    {"op": "edit", "date": "2024-01-05", "id": "n1", "fields": {"note": "milk\neggs\nbread"}},
+    {"op": "delete", "date": "2024-02-10", "id": "l1"},
+]
+
+def expected() -> dict:
+    data = json.loads(json.dumps(DATA))
+    for op in OPS:
+        core.apply_op(data, op)
+    return data
+
+def journal_store(tmp_path, binary=False):
+    name = "file_data.bin" if binary else "file_data.json"
+    return core.JournalStore(str(tmp_path / name), str(tmp_path / (name + ".journal")), binary=binary)
+
+# ---------------- Journal crashes ---------------- #
+
+def test_torn_journal_tail_is_dropped(tmp_path):
+    store = journal_store(tmp_path)
+    store.replace_all(json.loads(json.dumps(DATA)))
+    store.append(OPS)
+    with open(store.journal_path, "ab") as f:
+        f.write(b'{"op": "delete", "date": "2024-01-05", "id"')  # the process died mid-write
+    data = journal_store(tmp_path).load()
+    assert data == expected()
+    with open(store.journal_path, "rb") as f:
+        assert f.read().endswith(b"\n")  # truncated back to the last whole entry
+
+def test_journal_appends_after_a_torn_tail_are_kept(tmp_path):
+    store = journal_store(tmp_path)
+    store.replace_all({})
+    with open(store.journal_path, "ab") as f:
+        f.write(b'{"op": "add"')
+    store = journal_store(tmp_path)
+    store.load()
+    store.append(OPS[:1])
+    assert journal_store(tmp_path).load() == {"2024-02-10": [OPS[0]["item"]]}
+
+def test_crash_before_compacted_snapshot_is_written(tmp_path):
+    store = journal_store(tmp_path)
+    store.replace_all(json.loads(json.dumps(DATA)))
+    store.append(OPS[:2])
+    os.replace(store.journal_path, store.compacting_path)  # compact() rotated the journal, then the crash
+    store.append(OPS[2:])
+    data = journal_store(tmp_path).load()
+    assert data == expected()
+    assert not os.path.exists(store.compacting_path) and not os.path.exists(store.journal_path)
+    with open(store.snapshot_path, encoding="utf-8") as f:
+        assert json.load(f) == expected()
+
+def test_crash_after_snapshot_before_rotation_cleanup(tmp_path):
+    store = journal_store(tmp_path)
+    store.replace_all(json.loads(json.dumps(DATA)))
+    store.append(OPS)
+    os.replace(store.journal_path, store.compacting_path)
+    store._write_snapshot(expected())  # written, but the .compacting file was never removed
+    assert journal_store(tmp_path).load() == expected()  # replaying it again is harmless
+    assert not os.path.exists(store.compacting_path)
+
+def test_compact_folds_the_journal_into_the_snapshot(tmp_path):
+    store = journal_store(tmp_path)
+    data = store.load()
+    for op in OPS[:1]:
+        core.apply_op(data, op)
+    store.append(OPS[:1])
+    store.compact(data, block=True)
+    assert not os.path.exists(store.journal_path) and not os.path.exists(store.compacting_path)
+    assert journal_store(tmp_path).load() == data
+
+def test_unreadable_snapshot_is_kept_aside(tmp_path):
+    store = journal_store(tmp_path)
+    with open(store.snapshot_path, "w", encoding="utf-8") as f:
+        f.write('{"2024-01-05": [')
+    assert store.load() == {}
+    assert os.path.exists(store.snapshot_path + ".corrupt")
+
+def test_appv2_notes_get_their_title_back(tmp_path):
+    store = journal_store(tmp_path)
+    store.replace_all({"2024-01-05": [{"id": "n1", "desc": "Old note", "note": "text"}]})
+    assert journal_store(tmp_path).load() == {"2024-01-05": [{"id": "n1", "title": "Old note", "note": "text"}]}
+
+def test_appv2_note_desc_is_kept_when_it_differs_from_the_title(tmp_path):
+    store = journal_store(tmp_path)
+    store.replace_all({"2024-01-05": [{"id": "n1", "title": "Groceries", "desc": "older title", "note": "milk"},
+                                      {"id": "n2", "title": "Same", "desc": "Same", "note": "text"}]})
+    assert journal_store(tmp_path).load() == {"2024-01-05": [
+        {"id": "n1", "title": "Groceries", "desc": "older title", "note": "milk"},
+        {"id": "n2", "title": "Same", "note": "text"}]}
+
+# ---------------- Round trip ---------------- #
+
+STORES = {
+    "journal": lambda tmp_path: journal_store(tmp_path),
+    "binary": lambda tmp_path: journal_store(tmp_path, binary=True),
+    "sharded": lambda tmp_path: core.ShardedStore(str(tmp_path / "file_data.shards")),
+    "sqlite": lambda tmp_path: core.SqliteStore(str(tmp_path / "file_data.db")),
+}
+
+@pytest.mark.parametrize("kind", STORES)
+def test_round_trip(tmp_path, kind):
+    store = STORES[kind](tmp_path)
+    store.replace_all(json.loads(json.dumps(DATA)))
+    data = store.load_all()
+    for op in OPS:
+        core.apply_op(data, op)
+    store.append(OPS)
+    store.close(data)
+    store = STORES[kind](tmp_path)
+    assert store.load_all() == expected()
+    store.close(expected())
+
+@pytest.mark.parametrize("kind", ["sharded", "sqlite"])
+def test_older_months_load_on_demand(tmp_path, kind):
+    store = STORES[kind](tmp_path)
+    store.replace_all(json.loads(json.dumps(DATA)))
+    store.close(DATA)
+    store = STORES[kind](tmp_path)
+    assert store.load() == {"2024-02-10": DATA["2024-02-10"]}  # only the newest month up front
+    assert store.unloaded() == {"2024-01-05": 2}
+    assert store.load_month("2024-01") == {"2024-01-05": DATA["2024-01-05"]}
+    assert store.unloaded() == {}
+    store.close(DATA)
+
+def test_sqlite_keeps_the_desc_of_appv2_notes(tmp_path):
+    store = STORES["sqlite"](tmp_path)
+    note = {"id": "n1", "title": "Groceries", "desc": "older title", "note": "milk"}
+    store.replace_all({"2024-01-05": [note]})
+    assert store.load_all() == {"2024-01-05": [note]}
+    store.close({})